@@ -1,6 +1,9 @@
 import logging
+import queue
 from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
+from cryptography.fernet import Fernet
 from pydantic_settings import BaseSettings
 
 
@@ -9,6 +12,12 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    # Log every SQL statement (costly: formatting runs on the event loop).
+    sql_echo: bool = False
+    # Ping pooled connections on checkout; unset means on except for SQLite.
+    db_pool_pre_ping: Optional[bool] = None
+    # Seconds after which a pooled connection is replaced.
+    db_pool_recycle: int = 1800
 
     # Gitea
     gitea_url: str
@@ -25,6 +34,14 @@ class Settings(BaseSettings):
     # Nornir / concurrency tuning
     nornir_num_workers: int = 50
     api_semaphore_limit: int = 30
+    # Seconds an idle SSH session is kept for reuse by the next backup of the
+    # same device; raise above the schedule interval to reuse across runs.
+    netmiko_session_ttl: float = 60.0
+
+    # Digest for BackupResult.config_hash: "blake3" (needs the blake3
+    # package; falls back to blake2b without it), "blake2b", or "sha256" to
+    # stay comparable with hashes stored by pre-BLAKE releases.
+    config_hash_algorithm: str = "blake3"
 
     # Application
     log_level: str = "INFO"
@@ -39,11 +56,50 @@ def get_settings() -> Settings:
     return Settings()
 
 
+@lru_cache(maxsize=4)
+def get_fernet(fernet_key: Optional[str] = None) -> Fernet:
+    """
+    Return the Fernet cipher for *fernet_key* (default: the configured key).
+
+    Cached so the key is decoded and the cipher built once per process, not
+    once per credential.  Fernet instances are safe to share across threads.
+    """
+    return Fernet((fernet_key or get_settings().fernet_key).encode())
+
+
+_log_listener: Optional[QueueListener] = None
+
+
 def setup_logging(settings: Settings) -> None:
-    """Configure root logger from settings."""
-    log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s  %(name)-40s  %(levelname)-8s  %(message)s",
+    """
+    Configure root logger from settings.
+
+    The root logger only enqueues records; a QueueListener thread formats
+    and writes them, so logging from the event loop never waits on the
+    stream handler's lock or on stderr.  Like basicConfig, this is a no-op
+    if the root logger already has handlers.
+    """
+    global _log_listener
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(
+        "%(asctime)s  %(name)-40s  %(levelname)-8s  %(message)s",
         datefmt="%Y-%m-%dT%H:%M:%S",
-    )
+    ))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(getattr(logging, settings.log_level.upper(), logging.INFO))
+
+    _log_listener = QueueListener(log_queue, stream)
+    _log_listener.start()
+
+
+def stop_logging() -> None:
+    """Flush and stop the logging listener thread started by setup_logging."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
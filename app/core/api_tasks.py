@@ -3,26 +3,72 @@ Async backup tasks for API-driven platforms:
   • Palo Alto Networks (PAN-OS) — XML API
   • Fortinet FortiGate (FortiOS) — REST API
 
-Each function returns a dict compatible with BackupEngine._commit_config.
+Each function returns a dict compatible with BackupEngine._commit_config;
+"config" is the downloaded payload as UTF-8 bytes, which the scrubber
+consumes without decoding.
 SSL verification is intentionally disabled for air-gapped self-signed certs.
+
+The httpx.AsyncClient is owned by the caller (BackupEngine) and shared across
+every device in a job, so connections are pooled instead of re-handshaked per
+call.  Per-host state (PAN-OS key, FortiOS CSRF token) stays local to each
+coroutine.
 """
-import hashlib
+import codecs
 import logging
-import xml.etree.ElementTree as ET
 from typing import Any, Dict
 
 import httpx
+from lxml import etree
+
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; evaluated in C against each keygen response.
+_PANOS_KEY_XPATH = etree.XPath("//key/text()")
+# Device responses are untrusted — never resolve entities or fetch DTDs.
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+_DOWNLOAD_CHUNK = 64 * 1024
+
+
+async def _download_config(
+    client: httpx.AsyncClient, url: str, **kwargs: Any
+) -> bytes:
+    """
+    Stream a config download into a single buffer.
+
+    Avoids materialising resp.text only for the engine to re-encode it.
+    Returns UTF-8 bytes; only a body in some other declared charset is
+    transcoded.  Hashing is left to the engine, which digests the scrubbed
+    config it stores.
+    """
+    buf = bytearray()
+    async with client.stream("GET", url, **kwargs) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_bytes(_DOWNLOAD_CHUNK):
+            buf.extend(chunk)
+        encoding = resp.charset_encoding
+    config = bytes(buf)
+    if encoding and _needs_transcode(encoding):
+        config = config.decode(encoding, errors="replace").encode("utf-8")
+    return config
+
+
+def _needs_transcode(encoding: str) -> bool:
+    """True for a known charset whose bytes are not already valid UTF-8."""
+    try:
+        return codecs.lookup(encoding).name not in ("utf-8", "ascii")
+    except LookupError:
+        return False
+
 
 async def backup_palo_alto(
+    client: httpx.AsyncClient,
     hostname: str,
     ip: str,
     username: str,
     password: str,
     device_id: int,
-    timeout: int = 60,
 ) -> Dict[str, Any]:
     """
     Backup a Palo Alto Networks firewall via the XML API.
@@ -33,35 +79,29 @@ async def backup_palo_alto(
     """
     api_url = f"https://{ip}/api/"
 
-    async with httpx.AsyncClient(verify=False, timeout=timeout) as client:
-        # Step 1: obtain API key
-        key_resp = await client.get(
-            api_url,
-            params={"type": "keygen", "user": username, "passwd": password},
-        )
-        key_resp.raise_for_status()
-
-        root = ET.fromstring(key_resp.text)
-        key_elem = root.find(".//key")
-        if key_elem is None or not key_elem.text:
-            raise RuntimeError(f"PAN-OS keygen returned no key for {hostname}")
+    # Step 1: obtain API key
+    key_resp = await client.get(
+        api_url,
+        params={"type": "keygen", "user": username, "passwd": password},
+    )
+    key_resp.raise_for_status()
 
-        api_key = key_elem.text
+    key_text = _PANOS_KEY_XPATH(etree.fromstring(key_resp.content, _XML_PARSER))
+    if not key_text or not key_text[0]:
+        raise RuntimeError(f"PAN-OS keygen returned no key for {hostname}")
 
-        # Step 2: export running configuration
-        cfg_resp = await client.get(
-            api_url,
-            params={"type": "export", "category": "configuration", "key": api_key},
-        )
-        cfg_resp.raise_for_status()
+    api_key = str(key_text[0])
 
-    config_text = cfg_resp.text
-    config_hash = hashlib.sha256(config_text.encode()).hexdigest()
-    logger.info("Backup OK  %s (panos) — %d bytes", hostname, len(config_text))
+    # Step 2: export running configuration
+    config = await _download_config(
+        client,
+        api_url,
+        params={"type": "export", "category": "configuration", "key": api_key},
+    )
+    logger.debug("Backup OK  %s (panos) — %d bytes", hostname, len(config))
 
     return {
-        "config": config_text,
-        "hash": config_hash,
+        "config": config,
         "device_id": device_id,
         "hostname": hostname,
         "platform": "panos",
@@ -69,12 +109,12 @@ async def backup_palo_alto(
 
 
 async def backup_fortinet(
+    client: httpx.AsyncClient,
     hostname: str,
     ip: str,
     username: str,
     password: str,
     device_id: int,
-    timeout: int = 60,
 ) -> Dict[str, Any]:
     """
     Backup a Fortinet FortiGate appliance via the REST API.
@@ -86,45 +126,42 @@ async def backup_fortinet(
     """
     base = f"https://{ip}"
 
-    async with httpx.AsyncClient(verify=False, timeout=timeout) as client:
-        # Step 1: authenticate
-        login_resp = await client.post(
-            f"{base}/logincheck",
-            data={"username": username, "secretkey": password},
-        )
-        login_resp.raise_for_status()
-
-        # Fortinet uses a CSRF token returned in a cookie
-        csrf_token = client.cookies.get("ccsrftoken", "").strip('"')
-        if not csrf_token:
-            # Fallback: some versions use a header-based token from the body
-            csrf_token = ""
-
-        headers: Dict[str, str] = {}
-        if csrf_token:
-            headers["X-CSRFTOKEN"] = csrf_token
-
-        # Step 2: download config backup
-        cfg_resp = await client.get(
-            f"{base}/api/v2/monitor/system/config/backup",
-            params={"scope": "global"},
-            headers=headers,
-        )
-        cfg_resp.raise_for_status()
-
-        # Step 3: logout (best-effort)
-        try:
-            await client.post(f"{base}/logout", headers=headers)
-        except Exception:
-            pass
-
-    config_text = cfg_resp.text
-    config_hash = hashlib.sha256(config_text.encode()).hexdigest()
-    logger.info("Backup OK  %s (fortios) — %d bytes", hostname, len(config_text))
+    # Step 1: authenticate
+    login_resp = await client.post(
+        f"{base}/logincheck",
+        data={"username": username, "secretkey": password},
+    )
+    login_resp.raise_for_status()
+
+    # Fortinet uses a CSRF token returned in a cookie.  Read it from this
+    # login response rather than the shared client's jar so concurrent
+    # devices never see each other's token.
+    csrf_token = login_resp.cookies.get("ccsrftoken", "").strip('"')
+    if not csrf_token:
+        # Fallback: some versions use a header-based token from the body
+        csrf_token = ""
+
+    headers: Dict[str, str] = {}
+    if csrf_token:
+        headers["X-CSRFTOKEN"] = csrf_token
+
+    # Step 2: download config backup
+    config = await _download_config(
+        client,
+        f"{base}/api/v2/monitor/system/config/backup",
+        params={"scope": "global"},
+        headers=headers,
+    )
+
+    # Step 3: logout (best-effort)
+    try:
+        await client.post(f"{base}/logout", headers=headers)
+    except Exception:
+        pass
+    logger.debug("Backup OK  %s (fortios) — %d bytes", hostname, len(config))
 
     return {
-        "config": config_text,
-        "hash": config_hash,
+        "config": config,
         "device_id": device_id,
         "hostname": hostname,
         "platform": "fortios",
@@ -3,80 +3,201 @@ Backup engine: orchestrates a BackupJob across CLI and API devices.
 
 Architecture
 ────────────
-• CLI devices (IOS/NX-OS/EOS/OS10): run via Nornir + ThreadedRunner (50 workers).
-  A Nornir Processor bridges the thread pool back to the asyncio event loop so
-  each device completion triggers an immediate DB update + WebSocket publish.
+• CLI devices (IOS/NX-OS/EOS/OS10): blocking Netmiko sessions run on a
+  process-wide thread pool (nornir_num_workers, default 50) via
+  loop.run_in_executor.  Each device is its own coroutine, so a completion
+  triggers scrubbing + WebSocket publish directly — no cross-thread bridge
+  queue.
 
-• API devices (PAN-OS, FortiOS): run concurrently via asyncio.gather with a
-  configurable semaphore (default 30 concurrent).
+• API devices (PAN-OS, FortiOS): run by a fixed pool of worker tasks in an
+  asyncio.TaskGroup (api_semaphore_limit, default 30 concurrent).
 
-• progress_queues: module-level dict keyed by job_id.  The WebSocket endpoint
-  (dashboard.py) imports this dict directly — never rebind it.
+• Gitea: scrubbed configs are staged per site repo while devices run and
+  committed once per repo at the end of the job (commit_configs_bulk).
+
+• progress_queues: module-level dict of ProgressChannel keyed by job_id.  The
+  WebSocket endpoint (dashboard.py) imports this dict directly — never rebind it.
 """
 import asyncio
-import dataclasses
-import hashlib
+import collections
 import logging
-import queue as sync_queue
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
-
-from nornir.core import Nornir
-from nornir.core.configuration import Config
-from nornir.core.inventory import Host
-from nornir.plugins.runners import ThreadedRunner
-from nornir.core.task import AggregatedResult, MultiResult, Task
-from sqlalchemy import select
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Settings, get_settings
 from app.core.api_tasks import backup_fortinet, backup_palo_alto
 from app.core.cli_tasks import backup_config_cli
-from app.core.gitea_client import GiteaClient
-from app.core.nornir_inventory import DeviceData, build_nornir_inventory, load_device_data
-from app.core.scrubber import scrub_config
+from app.core.gitea_client import get_gitea_client
+from app.core.hashing import hash_algorithm, set_hash_algorithm
+from app.core.nornir_inventory import DeviceData, load_device_data
+from app.core.scrubber import scrub_and_digest
 from app.models import BackupJob, BackupJobStatus, BackupResult, BackupResultStatus
 
 logger = logging.getLogger(__name__)
 
-# Shared progress queues: job_id → asyncio.Queue of progress dicts.
-# The WebSocket router imports this dict reference — it must never be rebound.
-progress_queues: Dict[int, asyncio.Queue] = {}
+
+# Progress messages kept per job for a reader that falls behind.
+_PROGRESS_BACKLOG = 64
+
+# Seconds a finished job's channel is kept for late WebSocket readers.
+_PROGRESS_RETENTION = 300
 
 
-class _DeviceCompletionProcessor:
+class ProgressChannel:
     """
-    Nornir Processor that forwards per-host completion events from the
-    Nornir thread pool back into the asyncio event loop via
-    loop.call_soon_threadsafe.
+    Single-consumer stream of progress dicts for one job.
+
+    A deque plus an Event: put() is a plain synchronous append, with none of
+    asyncio.Queue's lock and waiter bookkeeping — there is only ever one
+    WebSocket reader per job.
+
+    The deque is bounded: with a slow or absent reader the oldest messages
+    are dropped.  Each message is a full snapshot, so the newest is all a
+    reader needs, and the terminal message is always the last one put.
     """
 
-    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
-        self._loop = loop
-        self._queue = queue
+    __slots__ = ("_buf", "_event")
+
+    def __init__(self, maxlen: int = _PROGRESS_BACKLOG) -> None:
+        self._buf: collections.deque = collections.deque(maxlen=maxlen)
+        self._event = asyncio.Event()
+
+    def put(self, item: dict) -> None:
+        self._buf.append(item)
+        self._event.set()
 
-    # ── Processor protocol methods ─────────────────────────────────────────────
+    async def get(self) -> dict:
+        while not self._buf:
+            self._event.clear()
+            await self._event.wait()
+        return self._buf.popleft()
 
-    def task_started(self, task: Task) -> None:
-        pass
+    async def get_latest(self) -> dict:
+        """Wait for a message, then return the newest, discarding older ones."""
+        while not self._buf:
+            self._event.clear()
+            await self._event.wait()
+        latest = self._buf[-1]
+        self._buf.clear()
+        return latest
 
-    def task_completed(self, task: Task, result: AggregatedResult) -> None:
-        pass
 
-    def task_instance_started(self, task: Task, host: Host) -> None:
-        pass
+# Shared progress channels: job_id → ProgressChannel of progress dicts.
+# The WebSocket router imports this dict reference — it must never be rebound.
+progress_queues: Dict[int, ProgressChannel] = {}
+
+
+def get_progress_channel(job_id: int) -> ProgressChannel:
+    """Return the progress channel for *job_id*, creating it if needed."""
+    channel = progress_queues.get(job_id)
+    if channel is None:
+        channel = progress_queues[job_id] = ProgressChannel()
+    return channel
+
+
+# API platform → backup coroutine.  Every handler takes the same keyword
+# arguments (client, hostname, ip, username, password, device_id).
+_API_HANDLERS: Dict[str, Callable[..., Awaitable[dict]]] = {
+    "panos": backup_palo_alto,
+    "fortios": backup_fortinet,
+}
 
-    def task_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
-        self._loop.call_soon_threadsafe(
-            self._queue.put_nowait,
-            {"hostname": host.name, "multi_result": result},
+# CLI worker pools, keyed by worker count and reused across jobs so each run
+# doesn't spin up (and tear down) its own threads.  Shut down on app exit.
+_cli_executors: Dict[int, ThreadPoolExecutor] = {}
+
+
+def get_cli_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Return the shared CLI thread pool with *max_workers* threads."""
+    pool = _cli_executors.get(max_workers)
+    if pool is None:
+        pool = _cli_executors[max_workers] = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="cli-backup",
         )
+    return pool
+
+
+def shutdown_cli_executors() -> None:
+    """Shut down every shared CLI pool; called from the app lifespan."""
+    while _cli_executors:
+        _, pool = _cli_executors.popitem()
+        pool.shutdown(wait=False, cancel_futures=True)
 
-    def subtask_instance_started(self, task: Task, host: Host) -> None:
-        pass
 
-    def subtask_instance_completed(self, task: Task, host: Host, result: MultiResult) -> None:
-        pass
+# Worker processes for scrubbing large configs, shared by every job.  Spawned
+# lazily on first submit ("spawn", not fork: the app process runs live
+# threads), so each worker imports the scrubber — compiling its patterns —
+# once for the app's lifetime rather than once per job.  Shut down on app exit.
+_scrub_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_scrub_pool() -> ProcessPoolExecutor:
+    """Return the shared scrub process pool, creating it on first use."""
+    global _scrub_pool
+    if _scrub_pool is None:
+        _scrub_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_hash_algorithm,
+            initargs=(hash_algorithm(),),
+        )
+    return _scrub_pool
+
+
+def shutdown_scrub_pool() -> None:
+    """Shut down the shared scrub pool; called from the app lifespan."""
+    global _scrub_pool
+    if _scrub_pool is not None:
+        _scrub_pool.shutdown(wait=False, cancel_futures=True)
+        _scrub_pool = None
+
+
+# Site repos committed to Gitea at once when a job's staged configs are flushed.
+_COMMIT_CONCURRENCY = 8
+
+# Configs at least this large are scrubbed in a worker process instead of on
+# the event loop; below it, pickling the text costs more than the regexes.
+_SCRUB_OFFLOAD_BYTES = 256 * 1024
+
+# Minimum seconds between "running" progress messages for one job.
+_PROGRESS_INTERVAL = 0.1
+
+# BackupResult rows are committed in batches of this size, or after this many
+# seconds — whichever comes first — instead of one commit per device.
+_RESULT_BATCH_SIZE = 25
+_RESULT_FLUSH_INTERVAL = 0.5
+
+
+def _result_row(
+    job_id: int,
+    device_id: int,
+    status: BackupResultStatus,
+    *,
+    config_hash: Optional[bytes] = None,
+    gitea_commit_sha: Optional[str] = None,
+    error_message: Optional[str] = None,
+) -> dict:
+    """
+    Parameters for one backup_results INSERT.  Every row carries the same
+    keys so a whole batch goes out as a single executemany.
+    """
+    return {
+        "job_id": job_id,
+        "device_id": device_id,
+        "status": status,
+        "config_hash": config_hash,
+        "gitea_commit_sha": gitea_commit_sha,
+        "error_message": error_message,
+    }
 
 
 class BackupEngine:
@@ -89,11 +210,36 @@ class BackupEngine:
     ) -> None:
         self.session = session
         self.settings = settings or get_settings()
-        self.gitea = GiteaClient(
-            self.settings.gitea_url,
-            self.settings.gitea_token,
-            self.settings.gitea_org,
+        # Shared across jobs; owned and closed by the app lifespan.
+        self.gitea = get_gitea_client(self.settings)
+        # One pooled client for every API device in the job — avoids a fresh
+        # TCP + TLS handshake per device.  Closed by aclose().
+        limit = self.settings.api_semaphore_limit
+        self._api_client = httpx.AsyncClient(
+            verify=False,
+            http2=True,
+            timeout=httpx.Timeout(60.0),
+            limits=httpx.Limits(
+                max_connections=limit * 2,
+                max_keepalive_connections=limit,
+            ),
         )
+        # Pending backup_results rows (_result_row dicts); drained by
+        # _result_writer().  None = stop.
+        self._result_queue: "asyncio.Queue[Optional[dict]]" = asyncio.Queue()
+        # Running totals for progress messages.  The job row's counters are
+        # advanced by _flush_results from the rows in each batch, so device
+        # coroutines never mutate the ORM row while a flush is in flight.
+        self._completed = 0
+        self._failed = 0
+        self._last_push = 0.0
+        # repo_full → [(device, config_hash, scrubbed bytes)] awaiting the
+        # per-repo bulk commit in _flush_commits().
+        self._pending_commits: Dict[str, List[Tuple[DeviceData, bytes, bytes]]] = {}
+
+    async def aclose(self) -> None:
+        """Release pooled HTTP connections held by the engine."""
+        await self._api_client.aclose()
 
     # ── Public entry point ─────────────────────────────────────────────────────
 
@@ -104,23 +250,26 @@ class BackupEngine:
         1. Load devices with eager-loaded relationships.
         2. Resolve credentials; immediately fail devices with no creds.
         3. Split into CLI vs. API groups.
-        4. Run CLI group via Nornir (threaded) + streaming processor.
-        5. Run API group via asyncio.gather + semaphore.
-        6. Finalise job status.
+        4. Ensure each distinct site repo once, concurrently.
+        5. Concurrently, run the CLI group on a thread pool and the API
+           group on a bounded pool of worker tasks.
+        6. Commit staged configs: one Gitea commit per site repo.
+        7. Finalise job status.
+
+        Per-device results are handed to a background writer task which owns
+        all session commits for the duration of the run.
         """
-        job = await self._fetch_job(job_id)
+        job = await self._start_job(job_id)
         if job is None:
             logger.error("BackupJob %d not found — aborting", job_id)
+            await self.aclose()
             return
 
-        job.started_at = datetime.utcnow()
-        job.status = BackupJobStatus.RUNNING
-        await self.session.commit()
-
         # Ensure a progress queue exists for WebSocket consumers.
-        if job_id not in progress_queues:
-            progress_queues[job_id] = asyncio.Queue()
-        pq: asyncio.Queue = progress_queues[job_id]
+        pq = get_progress_channel(job_id)
+
+        writer = asyncio.create_task(self._result_writer(job))
+        status = BackupJobStatus.FAILED
 
         try:
             all_devices = await load_device_data(
@@ -146,81 +295,92 @@ class BackupEngine:
                 else:
                     cli_devices.append(dev)
 
-            if cli_devices:
-                await self._run_cli_backups(job, cli_devices, pq)
+            logger.info(
+                "BackupJob %d started — %d CLI, %d API device(s)",
+                job_id, len(cli_devices), len(api_devices),
+            )
+            await self._preensure_repos(cli_devices + api_devices)
 
-            if api_devices:
-                await self._run_api_backups(job, api_devices, pq)
+            # SSH and HTTPS paths share no resources — run them side by side.
+            # Neither touches self.session; results go through the writer.
+            async with asyncio.TaskGroup() as tg:
+                if cli_devices:
+                    tg.create_task(self._run_cli_backups(job, cli_devices, pq))
+                if api_devices:
+                    tg.create_task(self._run_api_backups(job, api_devices, pq))
 
-            job.status = BackupJobStatus.COMPLETE
+            status = BackupJobStatus.COMPLETE
 
         except Exception as exc:
             logger.exception("BackupJob %d encountered a fatal error: %s", job_id, exc)
-            job.status = BackupJobStatus.FAILED
         finally:
+            # Commit whatever was staged, even if the run died part-way.
+            await self._flush_commits(job, pq)
+            self._result_queue.put_nowait(None)
+            await writer
+            job.status = status
             job.completed_at = datetime.utcnow()
             await self.session.commit()
-            await pq.put({
-                "completed": job.completed_devices,
+            logger.info(
+                "BackupJob %d finished %s — %d/%d device(s), %d failed",
+                job_id, status.value, self._completed, job.total_devices, self._failed,
+            )
+            pq.put({
+                "completed": self._completed,
                 "total": job.total_devices,
-                "failed": job.failed_devices,
-                "status": job.status.value,
+                "failed": self._failed,
+                "status": status.value,
                 "job_id": job_id,
             })
+            # Drop the channel later even if no WebSocket ever reads it.
+            asyncio.get_running_loop().call_later(
+                _PROGRESS_RETENTION, progress_queues.pop, job_id, None
+            )
+            await self.aclose()
 
-    # ── CLI path (Nornir / Netmiko) ────────────────────────────────────────────
+    # ── CLI path (Netmiko on worker threads) ───────────────────────────────────
 
     async def _run_cli_backups(
         self,
         job: BackupJob,
         cli_devices: List[DeviceData],
-        pq: asyncio.Queue,
+        pq: ProgressChannel,
     ) -> None:
-        """Run CLI backups via Nornir ThreadedRunner with a per-device processor."""
-        loop = asyncio.get_event_loop()
-        completion_queue: asyncio.Queue = asyncio.Queue()
-        processor = _DeviceCompletionProcessor(loop=loop, queue=completion_queue)
-
-        inventory = build_nornir_inventory(cli_devices)
-        runner = ThreadedRunner(num_workers=self.settings.nornir_num_workers)
-        nr = Nornir(inventory=inventory, config=Config(), runner=runner)
-        nr = nr.with_processors([processor])
+        """
+        Run CLI backups on the shared thread pool, handling each device as it
+        completes.
 
-        expected = len(cli_devices)
-        processed = 0
+        As on the API path, a fixed set of worker tasks — one per pool thread
+        — pulls devices from a shared iterator, so the number of coroutines
+        and of queued executor jobs stays bounded by nornir_num_workers.
+        """
+        workers = self.settings.nornir_num_workers
+        pool = get_cli_executor(workers)
+        pending = iter(cli_devices)
 
-        async def _nornir_in_thread() -> None:
-            try:
-                await asyncio.to_thread(lambda: nr.run(task=backup_config_cli))
-            finally:
-                # Push sentinel so the drain loop exits even if count mismatches.
-                completion_queue.put_nowait(None)
-
-        async def _drain_completions() -> None:
-            nonlocal processed
-            while processed < expected:
-                item = await completion_queue.get()
-                if item is None:
-                    break
-                hostname: str = item["hostname"]
-                multi_result: MultiResult = item["multi_result"]
-
-                if multi_result.failed:
-                    failed_results = [r for r in multi_result if r.failed]
-                    exc = failed_results[0].exception if failed_results else None
-                    error_msg = str(exc) if exc else "Unknown Nornir task failure"
-                    dev_id = next(
-                        (d.device_id for d in cli_devices if d.hostname == hostname), None
-                    )
-                    if dev_id is not None:
-                        await self._record_failure(job, dev_id, error_msg, pq)
-                else:
-                    data: dict = multi_result[0].result
-                    await self._commit_config(job=job, dev_data_map=cli_devices, data=data, pq=pq)
+        async def _worker() -> None:
+            for dev in pending:
+                await self._backup_cli_device(job, dev, pq, pool)
 
-                processed += 1
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(workers, len(cli_devices))):
+                tg.create_task(_worker())
 
-        await asyncio.gather(_nornir_in_thread(), _drain_completions())
+    async def _backup_cli_device(
+        self,
+        job: BackupJob,
+        dev: DeviceData,
+        pq: ProgressChannel,
+        pool: ThreadPoolExecutor,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(pool, backup_config_cli, dev)
+        except Exception as exc:
+            logger.error("CLI backup failed for %s: %s", dev.hostname, exc)
+            await self._record_failure(job, dev.device_id, str(exc) or type(exc).__name__, pq)
+            return
+        await self._commit_config(job=job, dev=dev, data=data, pq=pq)
 
     # ── API path (PAN-OS / FortiOS) ────────────────────────────────────────────
 
@@ -228,46 +388,43 @@ class BackupEngine:
         self,
         job: BackupJob,
         api_devices: List[DeviceData],
-        pq: asyncio.Queue,
+        pq: ProgressChannel,
     ) -> None:
-        """Run API-based backups concurrently with a semaphore."""
-        sem = asyncio.Semaphore(self.settings.api_semaphore_limit)
+        """
+        Run API-based backups on a fixed pool of api_semaphore_limit workers.
 
-        async def _backup_one(dev: DeviceData) -> None:
-            async with sem:
+        Each worker pulls the next device from a shared iterator until it is
+        exhausted, so only that many tasks ever exist, whatever the fleet
+        size.  _backup_api_device records its own failures, so nothing
+        escapes to unwind the TaskGroup.
+        """
+        pending = iter(api_devices)
+
+        async def _worker() -> None:
+            for dev in pending:
                 await self._backup_api_device(job, dev, pq)
 
-        await asyncio.gather(*[_backup_one(d) for d in api_devices], return_exceptions=True)
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(self.settings.api_semaphore_limit, len(api_devices))):
+                tg.create_task(_worker())
 
     async def _backup_api_device(
-        self, job: BackupJob, dev: DeviceData, pq: asyncio.Queue
+        self, job: BackupJob, dev: DeviceData, pq: ProgressChannel
     ) -> None:
         try:
-            if dev.platform == "panos":
-                result = await backup_palo_alto(
-                    hostname=dev.hostname,
-                    ip=dev.ip,
-                    username=dev.username,
-                    password=dev.password,
-                    device_id=dev.device_id,
-                )
-            elif dev.platform == "fortios":
-                result = await backup_fortinet(
-                    hostname=dev.hostname,
-                    ip=dev.ip,
-                    username=dev.username,
-                    password=dev.password,
-                    device_id=dev.device_id,
-                )
-            else:
+            handler = _API_HANDLERS.get(dev.platform)
+            if handler is None:
                 raise ValueError(f"Unknown API platform: {dev.platform!r}")
-
-            await self._commit_config(
-                job=job,
-                dev_data_map=[dev],
-                data=result,
-                pq=pq,
+            result = await handler(
+                client=self._api_client,
+                hostname=dev.hostname,
+                ip=dev.ip,
+                username=dev.username,
+                password=dev.password,
+                device_id=dev.device_id,
             )
+
+            await self._commit_config(job=job, dev=dev, data=result, pq=pq)
         except Exception as exc:
             logger.error("API backup failed for %s: %s", dev.hostname, exc)
             await self._record_failure(job, dev.device_id, str(exc), pq)
@@ -277,61 +434,135 @@ class BackupEngine:
     async def _commit_config(
         self,
         job: BackupJob,
-        dev_data_map: List[DeviceData],
+        dev: DeviceData,
         data: dict,
-        pq: asyncio.Queue,
+        pq: ProgressChannel,
     ) -> None:
-        """Scrub → hash → Gitea commit → record BackupResult → notify."""
-        hostname: str = data.get("hostname", "unknown")
-        device_id: int = data.get("device_id", 0)
-        platform: str = data.get("platform", "")
-        raw_config: str = data.get("config", "")
-
-        # Look up site info from the pre-loaded device list.
-        dev = next((d for d in dev_data_map if d.device_id == device_id), None)
-        if dev is None:
-            logger.error("Could not find DeviceData for device_id=%d hostname=%s", device_id, hostname)
-            await self._record_failure(job, device_id, "Internal: DeviceData not found", pq)
-            return
+        """
+        Scrub → hash → stage for the repo's bulk commit → notify.
+
+        The device counts as completed once staged; its BackupResult is
+        written by _flush_commits once the commit SHA is known.
+        """
+        hostname: str = dev.hostname
+        device_id: int = dev.device_id
+        platform: str = data.get("platform", dev.platform)
+        raw_config: Union[str, bytes] = data.get("config", "")
 
         try:
-            scrubbed = scrub_config(raw_config, platform)
-            config_hash = hashlib.sha256(scrubbed.encode()).hexdigest()
+            # The same bytes feed the digest and the Gitea payload.  CLI
+            # workers have already scrubbed and hashed on their thread;
+            # otherwise scrub + hash overlaps the repo check.
+            ensure = self.gitea.ensure_repo(
+                site_code=dev.site_code, repo_name=dev.gitea_repo_name
+            )
+            scrubbed = data.get("config_bytes")
+            if scrubbed is not None:
+                config_hash = data["hash"]
+                repo_full = await ensure
+            else:
+                (scrubbed, config_hash), repo_full = await asyncio.gather(
+                    self._scrub(raw_config, platform), ensure
+                )
+            self._pending_commits.setdefault(repo_full, []).append(
+                (dev, config_hash, scrubbed)
+            )
+            self._completed += 1
 
-            repo_full = f"{self.settings.gitea_org}/{dev.gitea_repo_name}"
-            await self.gitea.ensure_repo(site_code=dev.site_code, repo_name=dev.gitea_repo_name)
-            commit_sha = await self.gitea.commit_config(
+        except Exception as exc:
+            logger.error("Failed to stage config for %s: %s", hostname, exc)
+            await self._record_failure(job, device_id, str(exc), pq)
+            return
+
+        self._push_progress(job, pq)
+
+    async def _flush_commits(self, job: BackupJob, pq: ProgressChannel) -> None:
+        """
+        Commit every staged config: one Gitea commit per repo, then queue a
+        BackupResult per device.
+
+        Repos are independent, so their commits run concurrently over the
+        shared Gitea pool, at most _COMMIT_CONCURRENCY at a time; commits to
+        a single repo stay serial, as Gitea serialises writes to a branch.
+        """
+        pending, self._pending_commits = self._pending_commits, {}
+        sem = asyncio.Semaphore(_COMMIT_CONCURRENCY)
+
+        async def flush(repo_full: str, staged: List[Tuple[DeviceData, bytes, bytes]]) -> None:
+            async with sem:
+                await self._flush_repo(job, pq, repo_full, staged)
+
+        await asyncio.gather(*(flush(repo, staged) for repo, staged in pending.items()))
+
+    async def _flush_repo(
+        self,
+        job: BackupJob,
+        pq: ProgressChannel,
+        repo_full: str,
+        staged: List[Tuple[DeviceData, bytes, bytes]],
+    ) -> None:
+        """
+        Commit one repo's staged configs.  If the commit fails, each of its
+        devices is recorded as FAILED with the error.
+        """
+        files = {dev.hostname: scrubbed for dev, _, scrubbed in staged}
+        try:
+            shas = await self.gitea.commit_configs_bulk(
                 repo=repo_full,
-                device_hostname=hostname,
-                config_text=scrubbed,
-                commit_message=f"Automated backup: {hostname}",
+                files=files,
+                commit_message=f"Automated backup: job {job.id}, {len(files)} device(s)",
             )
+        except Exception as exc:
+            logger.error("Failed to commit %d config(s) to %s: %s", len(files), repo_full, exc)
+            # The repo may have been deleted or renamed in Gitea since it
+            # was cached; have the next job ensure it again.
+            self.gitea.forget_repo(staged[0][0].gitea_repo_name)
+            for dev, _, _ in staged:
+                self._result_queue.put_nowait(_result_row(
+                    job.id, dev.device_id, BackupResultStatus.FAILED,
+                    error_message=str(exc),
+                ))
+                self._failed += 1
+            self._push_progress(job, pq)
+            return
 
-            br = BackupResult(
-                job_id=job.id,
-                device_id=device_id,
-                status=BackupResultStatus.SUCCESS,
+        for dev, config_hash, _ in staged:
+            self._result_queue.put_nowait(_result_row(
+                job.id, dev.device_id, BackupResultStatus.SUCCESS,
                 config_hash=config_hash,
-                gitea_commit_sha=commit_sha,
-            )
-            self.session.add(br)
-            job.completed_devices += 1
-            await self.session.commit()
+                gitea_commit_sha=shas.get(dev.hostname, ""),
+            ))
 
-            logger.info("Committed backup for %s  sha=%s…", hostname, (commit_sha or "")[:12])
+    async def _scrub(self, raw_config: Union[str, bytes], platform: str) -> Tuple[bytes, bytes]:
+        """
+        Scrub and hash inline, or in the process pool for configs over the
+        threshold.  Returns (scrubbed bytes, digest).
+        """
+        if len(raw_config) < _SCRUB_OFFLOAD_BYTES:
+            return scrub_and_digest(raw_config, platform)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_scrub_pool(), scrub_and_digest, raw_config, platform
+        )
 
-        except Exception as exc:
-            logger.error("Failed to commit config for %s: %s", hostname, exc)
-            await self._record_failure(job, device_id, str(exc), pq)
-            return
+    async def _preensure_repos(self, devices: List[DeviceData]) -> None:
+        """
+        Ensure every distinct site repo up front, concurrently.
 
-        await pq.put({
-            "completed": job.completed_devices,
-            "total": job.total_devices,
-            "failed": job.failed_devices,
-            "status": "running",
-            "job_id": job.id,
-        })
+        Failures are only logged: the repo stays out of the cache, so each
+        device's own commit retries it and records the error per device.
+        """
+        unique = {dev.gitea_repo_name: dev for dev in devices}
+        results = await asyncio.gather(
+            *[
+                self.gitea.ensure_repo(site_code=dev.site_code, repo_name=dev.gitea_repo_name)
+                for dev in unique.values()
+            ],
+            return_exceptions=True,
+        )
+        for repo_name, res in zip(unique, results):
+            if isinstance(res, Exception):
+                logger.warning("Could not ensure repo %s: %s", repo_name, res)
 
     # ── Failure recording ──────────────────────────────────────────────────────
 
@@ -340,34 +571,139 @@ class BackupEngine:
         job: BackupJob,
         device_id: int,
         error_message: str,
-        pq: asyncio.Queue,
+        pq: ProgressChannel,
     ) -> None:
-        try:
-            br = BackupResult(
-                job_id=job.id,
-                device_id=device_id,
-                status=BackupResultStatus.FAILED,
-                error_message=error_message,
-            )
-            self.session.add(br)
-            job.completed_devices += 1
-            job.failed_devices += 1
-            await self.session.commit()
-        except Exception as exc:
-            logger.error("_record_failure DB error: %s", exc)
+        self._result_queue.put_nowait(_result_row(
+            job.id, device_id, BackupResultStatus.FAILED,
+            error_message=error_message,
+        ))
+        self._completed += 1
+        self._failed += 1
 
-        await pq.put({
-            "completed": job.completed_devices,
+        self._push_progress(job, pq)
+
+    def _push_progress(self, job: BackupJob, pq: ProgressChannel) -> None:
+        """
+        Publish a "running" progress message, coalescing bursts.
+
+        At most one message per _PROGRESS_INTERVAL, except that the update
+        for the last device always goes out.  The terminal message is sent
+        unconditionally by run_backup.
+        """
+        now = time.monotonic()
+        if now - self._last_push < _PROGRESS_INTERVAL and self._completed < job.total_devices:
+            return
+        self._last_push = now
+        pq.put({
+            "completed": self._completed,
             "total": job.total_devices,
-            "failed": job.failed_devices,
+            "failed": self._failed,
             "status": "running",
             "job_id": job.id,
         })
 
+    # ── Batched result writes ──────────────────────────────────────────────────
+
+    async def _result_writer(self, job: BackupJob) -> None:
+        """
+        Drain queued backup_results rows and commit them in batches.
+
+        Each batch commit also advances the job counters for its rows.
+        Exits after flushing when it receives None.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._result_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + _RESULT_FLUSH_INTERVAL
+            while len(batch) < _RESULT_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._result_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush_results(job, batch)
+
+    async def _flush_results(self, job: BackupJob, batch: List[dict]) -> None:
+        """
+        Insert *batch* and advance the job counters in the same transaction.
+
+        Rows go out as one executemany INSERT — no ORM objects or identity
+        map bookkeeping.  The counters are bumped in SQL (completed_devices =
+        completed_devices + :n) rather than written back from Python, so each
+        flush is one relative UPDATE with no read-modify-write on the job row.
+
+        If the batch fails, its rows are retried one at a time so one bad row
+        doesn't lose the rest; a row that still fails is recorded as FAILED
+        with the write error, keeping the job counters in step with progress.
+        """
+        try:
+            await self._write_results(job, batch)
+            return
+        except Exception as exc:
+            logger.error(
+                "Failed to write %d backup result(s), retrying one by one: %s", len(batch), exc,
+            )
+            await self._rollback(job)
+
+        for row in batch:
+            try:
+                await self._write_results(job, [row])
+                continue
+            except Exception as exc:
+                logger.error("Failed to write result for device %d: %s", row["device_id"], exc)
+                await self._rollback(job)
+                error = f"Result could not be recorded: {exc}"
+            try:
+                await self._write_results(job, [_result_row(
+                    job.id, row["device_id"], BackupResultStatus.FAILED, error_message=error,
+                )])
+            except Exception as exc:
+                logger.error("Dropping result for device %d: %s", row["device_id"], exc)
+                await self._rollback(job)
+                continue
+            if row["status"] != BackupResultStatus.FAILED:
+                self._failed += 1
+
+    async def _write_results(self, job: BackupJob, rows: List[dict]) -> None:
+        """Insert *rows* and bump the job counters for them, then commit."""
+        failed = sum(1 for row in rows if row["status"] == BackupResultStatus.FAILED)
+        await self.session.execute(insert(BackupResult), rows)
+        await self.session.execute(
+            update(BackupJob)
+            .where(BackupJob.id == job.id)
+            .values(
+                completed_devices=BackupJob.completed_devices + len(rows),
+                failed_devices=BackupJob.failed_devices + failed,
+            )
+        )
+        await self.session.commit()
+
+    async def _rollback(self, job: BackupJob) -> None:
+        await self.session.rollback()
+        # Rollback expires the job; reload it so later attribute writes
+        # don't trigger an implicit (sync) lazy load.
+        await self.session.refresh(job)
+
     # ── Helpers ────────────────────────────────────────────────────────────────
 
-    async def _fetch_job(self, job_id: int) -> Optional[BackupJob]:
+    async def _start_job(self, job_id: int) -> Optional[BackupJob]:
+        """Mark the job RUNNING and load it in a single UPDATE … RETURNING."""
         result = await self.session.execute(
-            select(BackupJob).where(BackupJob.id == job_id)
+            update(BackupJob)
+            .where(BackupJob.id == job_id)
+            .values(status=BackupJobStatus.RUNNING, started_at=datetime.utcnow())
+            .returning(BackupJob)
         )
-        return result.scalars().first()
+        job = result.scalars().first()
+        await self.session.commit()
+        return job
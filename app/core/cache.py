@@ -0,0 +1,45 @@
+"""
+In-process TTL cache for read-mostly API responses.
+
+The app runs as a single uvicorn process (APScheduler lives in it too), so a
+plain dict shared by every request is coherent — no external cache needed in
+the air-gapped deployment.  Writers call clear() after committing; entries
+also expire after the TTL as a backstop.
+
+All access happens on the event loop thread, so no locking is needed.  A
+reader that started before a clear() must not repopulate the cache with the
+rows it read, so set() takes the generation observed before the query and
+drops the value if a clear() happened since.
+"""
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Dict of values that expire *ttl* seconds after being stored."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.generation = 0
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for *key*, or None if absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expiry = entry
+        if time.monotonic() >= expiry:
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        """Store *value* unless the cache was cleared after *generation*."""
+        if generation == self.generation:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        """Drop every entry and invalidate reads already in flight."""
+        self.generation += 1
+        self._entries.clear()
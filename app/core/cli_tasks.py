@@ -1,73 +1,85 @@
 """
-Nornir task for CLI-based device backup (Cisco IOS/NX-OS, Arista EOS, Dell OS10).
+CLI-based device backup (Cisco IOS/NX-OS, Arista EOS, Dell OS10).
 
-Nornir tasks MUST be synchronous — Nornir runs them in a ThreadPoolExecutor.
-We call Netmiko directly rather than via task.run(netmiko_send_command) to
-keep the MultiResult structure simple: one Result per host, no sub-results.
+backup_config_cli is synchronous — Netmiko is blocking — and is run by the
+backup engine on a worker thread via loop.run_in_executor, one call per
+device.  It receives a plain DeviceData snapshot (no ORM objects) and raises
+on any error so the engine can record the failure.
+
+SSH sessions come from the process-wide netmiko_pool, so a device backed up
+again within the pool TTL skips the handshake.
+
+The config is also scrubbed, encoded and hashed here, on the worker thread,
+so the event loop only has to stage the resulting bytes.
 """
-import hashlib
 import logging
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
-from netmiko import ConnectHandler
-from nornir.core.task import Result, Task
+from app.core.netmiko_pool import netmiko_pool
+from app.core.nornir_inventory import DeviceData
+from app.core.scrubber import scrub_and_digest
 
 logger = logging.getLogger(__name__)
 
-_CONFIG_COMMANDS: dict[str, str] = {
+_DEFAULT_CONFIG_COMMAND = "show running-config"
+
+_CONFIG_COMMANDS: Mapping[str, str] = MappingProxyType({
     "cisco_ios": "show running-config",
     "cisco_nxos": "show running-config",
     "arista_eos": "show running-config",
     "dell_os10": "show running-configuration",
-}
-
+})
 
-def _config_command(netmiko_platform: str) -> str:
-    return _CONFIG_COMMANDS.get(netmiko_platform, "show running-config")
 
-
-def backup_config_cli(task: Task) -> Result:
+def backup_config_cli(dev: DeviceData) -> Dict[str, Any]:
     """
     Connect to a device via SSH, retrieve the running configuration, and
-    return it in the Result.  Raises on any error so Nornir marks the host
-    as failed and stores the exception for later processing.
+    return it in a dict compatible with BackupEngine._commit_config.
+
+    "config_bytes" is the scrubbed config as UTF-8 and "hash" its digest;
+    the engine reuses both instead of scrubbing and hashing again.
     """
-    host = task.host
-    device_id: int = host.data["device_id"]
-    platform: str = host.data["platform"]
-    netmiko_platform: str = host.platform  # already mapped in the inventory
+    netmiko_platform = dev.netmiko_platform
 
-    logger.info("Connecting to %s (%s) …", host.name, netmiko_platform)
+    logger.debug("Connecting to %s (%s) …", dev.hostname, netmiko_platform)
 
     conn_params = {
         "device_type": netmiko_platform,
-        "host": host.hostname,
-        "username": host.username,
-        "password": host.password,
-        "port": host.port or 22,
+        "host": dev.ip,
+        "username": dev.username,
+        "password": dev.password,
+        "port": dev.port or 22,
         "timeout": 60,
         "session_timeout": 120,
         "global_delay_factor": 2,
     }
 
-    with ConnectHandler(**conn_params) as conn:
-        command = _config_command(netmiko_platform)
+    # Reuse an SSH session left open by a recent backup of this device.
+    key = (dev.ip, conn_params["port"], dev.username, netmiko_platform)
+    conn = netmiko_pool.acquire(key, conn_params)
+    alive = False
+    try:
+        command = _CONFIG_COMMANDS.get(netmiko_platform, _DEFAULT_CONFIG_COMMAND)
         config_text: str = conn.send_command(command, read_timeout=120)
+        alive = True
+    finally:
+        netmiko_pool.release(key, conn, alive)
 
-    config_hash = hashlib.sha256(config_text.encode()).hexdigest()
-    logger.info(
-        "Backup OK  %s — %d bytes  sha256=%s…",
-        host.name,
-        len(config_text),
-        config_hash[:12],
-    )
+    config_bytes, config_hash = scrub_and_digest(config_text, dev.platform)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Backup OK  %s — %d bytes  hash=%s…",
+            dev.hostname,
+            len(config_text),
+            config_hash.hex()[:12],
+        )
 
-    return Result(
-        host=host,
-        result={
-            "config": config_text,
-            "hash": config_hash,
-            "device_id": device_id,
-            "platform": platform,
-            "hostname": host.name,
-        },
-    )
+    return {
+        "config": config_text,
+        "config_bytes": config_bytes,
+        "hash": config_hash,
+        "device_id": dev.device_id,
+        "platform": dev.platform,
+        "hostname": dev.hostname,
+    }
@@ -4,25 +4,93 @@ Async Gitea API client.
 Responsibilities
 ────────────────
 • ensure_repo(site_code, repo_name) — create org + repo if absent (idempotent)
-• commit_config(repo, device_hostname, config_text, commit_message)
+• commit_config(repo, device_hostname, config_bytes, commit_message)
+• commit_configs_bulk(repo, files, commit_message) — many files, one commit
 • get_file_content(repo, device_hostname) — fetch latest config text
 • get_diff(repo, device_hostname) — unified diff between last two commits
+
+get_gitea_client() returns the process-wide instance shared by the backup
+engine and the routers; close_gitea_client() closes it on app shutdown.
 """
+import asyncio
+import collections
 import logging
 from base64 import b64decode, b64encode
-from typing import Optional
+from typing import AsyncIterator, Dict, Optional
 
 import httpx
+import orjson
+
+from app.config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 
-# Seconds to wait for Gitea API responses
-_TIMEOUT = 30
-_COMMIT_TIMEOUT = 60
+# Gitea API timeouts.  Connect and pool waits are short so a dead Gitea fails
+# fast; commits carry whole configs and get longer write/read budgets.
+_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0)
+_COMMIT_TIMEOUT = httpx.Timeout(connect=5.0, read=60.0, write=120.0, pool=5.0)
+
+# Transparent retries for failed connection attempts (DNS, refused, reset).
+_CONNECT_RETRIES = 2
+
+# Configs at least this large are base64-encoded on a worker thread; below
+# it, the thread hop costs more than the encode.
+_B64_OFFLOAD_BYTES = 256 * 1024
+
+
+async def _b64encode(data: bytes) -> bytes:
+    """
+    base64-encode *data*, off the event loop for large configs.
+
+    binascii holds the GIL, but a worker thread is still preempted every
+    switch interval, so the loop keeps serving other commits and progress
+    updates instead of stalling for the whole encode.
+    """
+    if len(data) >= _B64_OFFLOAD_BYTES:
+        return await asyncio.to_thread(b64encode, data)
+    return b64encode(data)
+
+
+async def _bulk_commit_body(
+    commit_message: str,
+    files: Dict[str, bytes],
+    current_shas: Dict[str, str],
+) -> AsyncIterator[bytes]:
+    """
+    Yield the JSON body for POST /repos/{repo}/contents piece by piece.
+
+    Each file's base64 is produced only when it is about to be sent, and goes
+    out as bytes — there is no decoded str, JSON-escaped copy or joined body
+    holding every config at once.  Base64 is plain ASCII, so it can be
+    spliced into the JSON string without escaping.
+    """
+    yield b'{"branch":"main","message":' + orjson.dumps(commit_message) + b',"files":['
+    for i, (hostname, config_bytes) in enumerate(files.items()):
+        file_path = f"{hostname}.txt"
+        change = {"path": file_path}
+        sha = current_shas.get(file_path)
+        if sha:
+            change["operation"] = "update"
+            change["sha"] = sha
+        else:
+            change["operation"] = "create"
+        # Re-open the serialised object to append the content member.
+        head = orjson.dumps(change)[:-1]
+        yield (b"," if i else b"") + head + b',"content":"'
+        yield await _b64encode(config_bytes)
+        yield b'"}'
+    yield b"]}"
 
 
 class GiteaClient:
-    """Async wrapper around the Gitea v1 REST API."""
+    """
+    Async wrapper around the Gitea v1 REST API.
+
+    Holds one pooled HTTP/2 client for its lifetime, so every call reuses
+    kept-alive connections instead of paying a fresh TCP (+TLS) handshake.
+    Call aclose() when done.  Application code should use the shared
+    instance from get_gitea_client() rather than constructing its own.
+    """
 
     def __init__(self, base_url: str, token: str, org: str = "agncf") -> None:
         self.base_url = base_url.rstrip("/")
@@ -33,6 +101,25 @@ class GiteaClient:
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        self._client = httpx.AsyncClient(
+            base_url=f"{self.base_url}/api/v1",
+            headers=self._headers,
+            timeout=_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=_CONNECT_RETRIES,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            ),
+        )
+        # repo_name → "{org}/{repo_name}" for repos known to exist.
+        self._repo_cache: Dict[str, str] = {}
+        self._repo_locks: "collections.defaultdict[str, asyncio.Lock]" = (
+            collections.defaultdict(asyncio.Lock)
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self._client.aclose()
 
     # ── Repository management ──────────────────────────────────────────────────
 
@@ -41,67 +128,78 @@ class GiteaClient:
         Ensure {org}/{repo_name} exists. Creates the org and repo if absent.
         Returns the full repo name ("{org}/{repo_name}").
         Idempotent — safe to call on every backup.
+
+        Results are cached for the client's lifetime, so only the first call
+        per repo touches Gitea.  A per-repo lock makes concurrent first calls
+        wait for one GET/POST sequence instead of racing their own.
         """
+        repo_full = self._repo_cache.get(repo_name)
+        if repo_full is not None:
+            return repo_full
+        async with self._repo_locks[repo_name]:
+            repo_full = self._repo_cache.get(repo_name)
+            if repo_full is None:
+                repo_full = await self._ensure_repo_uncached(site_code, repo_name)
+                self._repo_cache[repo_name] = repo_full
+        return repo_full
+
+    def forget_repo(self, repo_name: str) -> None:
+        """Drop *repo_name* from the ensure_repo cache so the next call re-checks it."""
+        self._repo_cache.pop(repo_name, None)
+
+    async def _ensure_repo_uncached(self, site_code: str, repo_name: str) -> str:
         repo_full = f"{self.org}/{repo_name}"
 
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-
-            # 1. Check if repo already exists — fastest path
-            repo_resp = await client.get(
-                f"{self.base_url}/api/v1/repos/{repo_full}",
-                headers=self._headers,
-            )
-            if repo_resp.status_code == 200:
-                logger.debug("Repo %s already exists", repo_full)
-                return repo_full
-
-            # 2. Ensure the organisation exists
-            org_resp = await client.get(
-                f"{self.base_url}/api/v1/orgs/{self.org}",
-                headers=self._headers,
+        client = self._client
+
+        # 1. Check if repo already exists — fastest path
+        repo_resp = await client.get(f"/repos/{repo_full}")
+        if repo_resp.status_code == 200:
+            logger.debug("Repo %s already exists", repo_full)
+            return repo_full
+
+        # 2. Ensure the organisation exists
+        org_resp = await client.get(f"/orgs/{self.org}")
+        if org_resp.status_code != 200:
+            logger.info("Org %s not found (HTTP %d) — creating", self.org, org_resp.status_code)
+            # Use POST /api/v1/orgs (standard endpoint, not /admin/orgs)
+            create_org = await client.post(
+                "/orgs",
+                content=orjson.dumps({"username": self.org, "visibility": "private"}),
             )
-            if org_resp.status_code != 200:
-                logger.info("Org %s not found (HTTP %d) — creating", self.org, org_resp.status_code)
-                # Use POST /api/v1/orgs (standard endpoint, not /admin/orgs)
-                create_org = await client.post(
-                    f"{self.base_url}/api/v1/orgs",
-                    headers=self._headers,
-                    json={"username": self.org, "visibility": "private"},
+            if create_org.status_code in (200, 201):
+                logger.info("Created Gitea org '%s'", self.org)
+            else:
+                raise RuntimeError(
+                    f"Could not create org '{self.org}': "
+                    f"HTTP {create_org.status_code} — {create_org.text}"
                 )
-                if create_org.status_code in (200, 201):
-                    logger.info("Created Gitea org '%s'", self.org)
-                else:
-                    raise RuntimeError(
-                        f"Could not create org '{self.org}': "
-                        f"HTTP {create_org.status_code} — {create_org.text}"
-                    )
-
-            # 3. Create the repository under the organisation
-            create_resp = await client.post(
-                f"{self.base_url}/api/v1/orgs/{self.org}/repos",
-                headers=self._headers,
-                json={
-                    "name": repo_name,
-                    "description": f"Config backups — site {site_code}",
-                    "private": True,
-                    "auto_init": True,
-                    "default_branch": "main",
-                },
-            )
 
-            if create_resp.status_code in (200, 201):
-                logger.info("Created repo %s", repo_full)
-                return repo_full
+        # 3. Create the repository under the organisation
+        create_resp = await client.post(
+            f"/orgs/{self.org}/repos",
+            content=orjson.dumps({
+                "name": repo_name,
+                "description": f"Config backups — site {site_code}",
+                "private": True,
+                "auto_init": True,
+                "default_branch": "main",
+            }),
+        )
 
-            # 409 = already exists (race condition between concurrent jobs) — fine
-            if create_resp.status_code == 409:
-                logger.debug("Repo %s already exists (concurrent create)", repo_full)
-                return repo_full
+        if create_resp.status_code in (200, 201):
+            logger.info("Created repo %s", repo_full)
+            return repo_full
 
-            raise RuntimeError(
-                f"Could not create repo {repo_full}: "
-                f"HTTP {create_resp.status_code} — {create_resp.text}"
-            )
+        # 409 = already exists (race condition between concurrent jobs) — fine
+        if create_resp.status_code == 409:
+            logger.debug("Repo %s already exists (concurrent create)", repo_full)
+            return repo_full
+
+        raise RuntimeError(
+            f"Could not create repo {repo_full}: "
+            f"HTTP {create_resp.status_code} — {create_resp.text}"
+        )
 
     # ── File commit ────────────────────────────────────────────────────────────
 
@@ -109,47 +207,50 @@ class GiteaClient:
         self,
         repo: str,
         device_hostname: str,
-        config_text: str,
+        config_bytes: bytes,
         commit_message: str,
     ) -> str:
         """
         Create or update {device_hostname}.txt in *repo* via the Contents API.
+        *config_bytes* is the UTF-8 encoded config, so callers that already
+        hold bytes (e.g. for hashing) avoid a second encode.
         Returns the commit SHA (empty string if unavailable).
         """
         file_path = f"{device_hostname}.txt"
-        encoded_content = b64encode(config_text.encode()).decode()
-
-        async with httpx.AsyncClient(timeout=_COMMIT_TIMEOUT) as client:
-            url = f"{self.base_url}/api/v1/repos/{repo}/contents/{file_path}"
-
-            # Fetch current file SHA — needed for updates (Gitea requires it)
-            current_sha: Optional[str] = None
-            get_resp = await client.get(url, headers=self._headers)
-            if get_resp.status_code == 200:
-                current_sha = get_resp.json().get("sha")
-            elif get_resp.status_code not in (404,):
-                logger.warning(
-                    "Unexpected response fetching current SHA for %s: HTTP %d",
-                    file_path, get_resp.status_code,
-                )
+        encoded_content = (await _b64encode(config_bytes)).decode("ascii")
+
+        client = self._client
+        url = f"/repos/{repo}/contents/{file_path}"
+
+        # Fetch current file SHA — needed for updates (Gitea requires it)
+        current_sha: Optional[str] = None
+        get_resp = await client.get(url)
+        if get_resp.status_code == 200:
+            current_sha = orjson.loads(get_resp.content).get("sha")
+        elif get_resp.status_code not in (404,):
+            logger.warning(
+                "Unexpected response fetching current SHA for %s: HTTP %d",
+                file_path, get_resp.status_code,
+            )
 
-            payload: dict = {
-                "content": encoded_content,
-                "message": commit_message,
-                "branch": "main",
-            }
+        payload: dict = {
+            "content": encoded_content,
+            "message": commit_message,
+            "branch": "main",
+        }
 
-            if current_sha:
-                # File exists — update requires PUT + current SHA
-                payload["sha"] = current_sha
-                resp = await client.put(url, headers=self._headers, json=payload)
-            else:
-                # File does not exist yet — creation requires POST (no SHA)
-                resp = await client.post(url, headers=self._headers, json=payload)
+        if current_sha:
+            # File exists — update requires PUT + current SHA
+            payload["sha"] = current_sha
+            resp = await client.put(url, content=orjson.dumps(payload), timeout=_COMMIT_TIMEOUT)
+        else:
+            # File does not exist yet — creation requires POST (no SHA)
+            resp = await client.post(url, content=orjson.dumps(payload), timeout=_COMMIT_TIMEOUT)
 
         if resp.status_code in (200, 201):
-            commit_sha: str = resp.json().get("commit", {}).get("sha", "")
-            logger.info("Committed %s → %s  sha=%s…", file_path, repo, commit_sha[:12])
+            commit_sha: str = orjson.loads(resp.content).get("commit", {}).get("sha", "")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Committed %s → %s  sha=%s…", file_path, repo, commit_sha[:12])
             return commit_sha
 
         raise RuntimeError(
@@ -157,23 +258,94 @@ class GiteaClient:
             f"HTTP {resp.status_code} — {resp.text}"
         )
 
+    async def commit_configs_bulk(
+        self,
+        repo: str,
+        files: Dict[str, bytes],
+        commit_message: str,
+    ) -> Dict[str, str]:
+        """
+        Write {hostname}.txt for every entry of *files* (hostname → config
+        bytes) in a single commit on main.
+
+        Uses the multi-file Contents API (POST /repos/{repo}/contents, Gitea
+        1.20+): one GET for the current blob SHAs of the repo root plus one
+        POST, instead of a GET + PUT per file.  Gitea has no writable git
+        data API (blobs/trees/commits), so this is the batching primitive.
+        On older servers that lack the endpoint it falls back to one
+        commit_config() call per file.  A failed root listing raises
+        immediately rather than guessing create vs update for every file:
+        repos are created with auto_init, so a 404 there means the repo (or
+        its main branch) is gone, not that it is empty.
+
+        Returns hostname → commit SHA.
+        """
+        if not files:
+            return {}
+
+        client = self._client
+        url = f"/repos/{repo}/contents"
+
+        list_resp = await client.get(url, params={"ref": "main"})
+        if list_resp.status_code == 404:
+            raise RuntimeError(f"Repo {repo} not found in Gitea (HTTP 404)")
+        if list_resp.status_code != 200:
+            raise RuntimeError(
+                f"Listing {repo} failed: HTTP {list_resp.status_code} — {list_resp.text}"
+            )
+        current: Dict[str, str] = {
+            entry["name"]: entry["sha"]
+            for entry in orjson.loads(list_resp.content)
+            if entry.get("type") == "file"
+        }
+
+        resp = await client.post(
+            url,
+            content=_bulk_commit_body(commit_message, files, current),
+            timeout=_COMMIT_TIMEOUT,
+        )
+
+        if resp.status_code in (200, 201):
+            commit_sha: str = orjson.loads(resp.content).get("commit", {}).get("sha", "")
+            logger.info("Committed %d file(s) → %s  sha=%s…", len(files), repo, commit_sha[:12])
+            return dict.fromkeys(files, commit_sha)
+
+        # 405, or a 404 for a repo whose root we just listed, means the
+        # endpoint itself is missing.
+        if resp.status_code in (404, 405):
+            logger.warning(
+                "Multi-file commit unsupported by Gitea at %s (HTTP %d) — "
+                "committing %d file(s) individually",
+                self.base_url, resp.status_code, len(files),
+            )
+            shas: Dict[str, str] = {}
+            for hostname, config_bytes in files.items():
+                shas[hostname] = await self.commit_config(
+                    repo=repo,
+                    device_hostname=hostname,
+                    config_bytes=config_bytes,
+                    commit_message=commit_message,
+                )
+            return shas
+
+        raise RuntimeError(
+            f"Bulk commit of {len(files)} file(s) to {repo} failed: "
+            f"HTTP {resp.status_code} — {resp.text}"
+        )
+
     # ── File content retrieval ─────────────────────────────────────────────────
 
     async def get_file_content(self, repo: str, device_hostname: str) -> str:
         """Return the current content of {device_hostname}.txt from the repo."""
         file_path = f"{device_hostname}.txt"
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-            resp = await client.get(
-                f"{self.base_url}/api/v1/repos/{repo}/contents/{file_path}",
-                headers=self._headers,
-            )
+        resp = await self._client.get(f"/repos/{repo}/contents/{file_path}")
         if resp.status_code == 404:
             raise RuntimeError(f"No backup found for {device_hostname} in {repo}")
         if resp.status_code != 200:
             raise RuntimeError(
                 f"Could not fetch {file_path}: HTTP {resp.status_code}"
             )
-        return b64decode(resp.json()["content"]).decode()
+        return b64decode(orjson.loads(resp.content)["content"]).decode()
 
     # ── Diff retrieval ─────────────────────────────────────────────────────────
 
@@ -183,20 +355,26 @@ class GiteaClient:
         {device_hostname}.txt.
 
         Gitea's /compare endpoint is not available in all versions, so we
-        fetch both file versions directly via the contents API and generate
-        the diff locally using difflib.
+        fetch both file versions directly and generate the diff locally using
+        difflib.  Only what the diff needs is requested: the commit list
+        without per-commit stats, file lists or signature checks, and each
+        version as raw bytes rather than base64 inside a JSON envelope.
         """
         import difflib
 
         file_path = f"{device_hostname}.txt"
 
         # 1. Get the last 2 commits that touched this file
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-            commits_resp = await client.get(
-                f"{self.base_url}/api/v1/repos/{repo}/commits",
-                headers=self._headers,
-                params={"path": file_path, "limit": 2},
-            )
+        commits_resp = await self._client.get(
+            f"/repos/{repo}/commits",
+            params={
+                "path": file_path,
+                "limit": 2,
+                "stat": "false",
+                "verification": "false",
+                "files": "false",
+            },
+        )
 
         if commits_resp.status_code != 200:
             return (
@@ -204,7 +382,7 @@ class GiteaClient:
                 f"HTTP {commits_resp.status_code}"
             )
 
-        commits = commits_resp.json()
+        commits = orjson.loads(commits_resp.content)
         if len(commits) < 2:
             return (
                 f"Only {len(commits)} commit(s) found — "
@@ -216,26 +394,19 @@ class GiteaClient:
         latest_date   = commits[0].get("commit", {}).get("committer", {}).get("date", latest_sha[:12])
         previous_date = commits[1].get("commit", {}).get("committer", {}).get("date", previous_sha[:12])
 
-        # 2. Fetch file content at each commit ref
-        async with httpx.AsyncClient(timeout=_TIMEOUT) as client:
-            prev_resp = await client.get(
-                f"{self.base_url}/api/v1/repos/{repo}/contents/{file_path}",
-                headers=self._headers,
-                params={"ref": previous_sha},
-            )
-            new_resp = await client.get(
-                f"{self.base_url}/api/v1/repos/{repo}/contents/{file_path}",
-                headers=self._headers,
-                params={"ref": latest_sha},
-            )
+        # 2. Fetch raw file content at both commit refs in parallel
+        prev_resp, new_resp = await asyncio.gather(
+            self._client.get(f"/repos/{repo}/raw/{file_path}", params={"ref": previous_sha}),
+            self._client.get(f"/repos/{repo}/raw/{file_path}", params={"ref": latest_sha}),
+        )
 
         if prev_resp.status_code != 200:
             return f"Could not fetch previous version: HTTP {prev_resp.status_code}"
         if new_resp.status_code != 200:
             return f"Could not fetch latest version: HTTP {new_resp.status_code}"
 
-        prev_text = b64decode(prev_resp.json()["content"]).decode()
-        new_text  = b64decode(new_resp.json()["content"]).decode()
+        prev_text = prev_resp.content.decode()
+        new_text  = new_resp.content.decode()
 
         # 3. Generate unified diff locally
         diff_lines = list(difflib.unified_diff(
@@ -249,3 +420,27 @@ class GiteaClient:
             return "Config unchanged since last backup."
 
         return "".join(diff_lines)
+
+
+# Process-wide client: one connection pool (and ensure_repo cache) shared by
+# every backup job and request handler.  Closed from the app lifespan.
+_shared_client: Optional[GiteaClient] = None
+
+
+def get_gitea_client(settings: Optional[Settings] = None) -> GiteaClient:
+    """Return the shared GiteaClient, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        settings = settings or get_settings()
+        _shared_client = GiteaClient(
+            settings.gitea_url, settings.gitea_token, settings.gitea_org
+        )
+    return _shared_client
+
+
+async def close_gitea_client() -> None:
+    """Close the shared GiteaClient; called from the app lifespan."""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,67 @@
+"""
+Content digests for backed-up configurations.
+
+config_hash is a change-detection fingerprint, not a signature, so it uses a
+fast non-SHA-2 hash: BLAKE3 (SIMD-vectorised, several times faster again on
+multi-MB configs) when the blake3 package is installed and selected, else
+BLAKE2b — faster than SHA-256 in CPython on hosts without SHA extensions.
+SHA-256, the digest of releases before BLAKE, stays selectable so existing
+deployments can keep hashes comparable with their stored history.  All three
+produce a 32-byte digest, stored raw in the BINARY(32)
+BackupResult.config_hash column; the API renders it as hex.
+
+The algorithm is process-wide: set_hash_algorithm() is called from the app
+lifespan with Settings.config_hash_algorithm, and from the initializer of
+any worker process that hashes configs.
+"""
+import hashlib
+import logging
+from typing import Callable, Dict
+
+try:
+    from blake3 import blake3 as _blake3
+except ImportError:  # optional dependency
+    _blake3 = None
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 32
+
+_DIGESTS: Dict[str, Callable[[bytes], bytes]] = {
+    "blake2b": lambda data: hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest(),
+    "blake3": lambda data: _blake3(data).digest(),
+    "sha256": lambda data: hashlib.sha256(data).digest(),
+}
+
+HASH_ALGORITHMS = tuple(_DIGESTS)
+
+_algorithm = "blake2b"
+
+
+def set_hash_algorithm(name: str) -> None:
+    """
+    Select the digest used for config_hash ("blake2b", "blake3" or "sha256").
+
+    Falls back to blake2b, with a warning, if blake3 is requested but the
+    package is not installed.
+    """
+    global _algorithm
+    name = name.lower()
+    if name not in HASH_ALGORITHMS:
+        raise ValueError(
+            f"Unknown config hash algorithm {name!r}; expected one of {HASH_ALGORITHMS}"
+        )
+    if name == "blake3" and _blake3 is None:
+        logger.warning("blake3 is not installed — hashing configs with blake2b")
+        name = "blake2b"
+    _algorithm = name
+
+
+def hash_algorithm() -> str:
+    """Return the digest currently used for config_hash."""
+    return _algorithm
+
+
+def config_digest(data: bytes) -> bytes:
+    """Return the digest of an already-encoded config payload."""
+    return _DIGESTS[_algorithm](data)
@@ -0,0 +1,124 @@
+"""
+Process-wide pool of idle Netmiko SSH sessions.
+
+An SSH handshake (TCP + key exchange + auth) costs hundreds of milliseconds
+per device, which dominates a CLI backup of a short config.  Sessions are
+therefore kept open after a backup and handed to the next backup of the same
+device if it starts within the TTL (NETMIKO_SESSION_TTL, applied from the app
+lifespan).  The default minute covers retries and manual or overlapping jobs
+run back to back; scheduled runs are at least an hour apart, so reusing
+sessions across them needs a TTL longer than the schedule interval, at the
+cost of holding an SSH session open on every device in between.
+
+Sessions are keyed by (host, port, username, device_type).  A pooled session
+is checked with is_alive() before reuse; one that fails, or any session whose
+command raised, is disconnected instead of being pooled.  A daemon reaper
+thread closes sessions left idle longer than the TTL.
+
+Thread-safe: acquire/release are called from the CLI worker threads.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from netmiko import ConnectHandler
+
+logger = logging.getLogger(__name__)
+
+# (host, port, username, netmiko device_type)
+SessionKey = Tuple[str, int, Optional[str], str]
+
+# Seconds an idle session is kept for reuse; Settings.netmiko_session_ttl
+# overrides it for the shared pool.
+DEFAULT_TTL = 60.0
+
+
+class NetmikoPool:
+    """Keyed pool of idle Netmiko connections with a TTL."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        connect: Callable[..., Any] = ConnectHandler,
+    ) -> None:
+        self.ttl = ttl
+        self._connect = connect
+        self._idle: Dict[SessionKey, List[Tuple[Any, float]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+    def acquire(self, key: SessionKey, conn_params: Dict[str, Any]) -> Any:
+        """Return a live pooled session for *key*, or open a new one."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                conn, last_used = idle.pop()
+            if time.monotonic() - last_used < self.ttl and _is_alive(conn):
+                logger.debug("Reusing SSH session to %s", key[0])
+                return conn
+            _disconnect(conn)
+        return self._connect(**conn_params)
+
+    def release(self, key: SessionKey, conn: Any, alive: bool) -> None:
+        """Return *conn* to the pool, or disconnect it if it is not reusable."""
+        if not alive or self._stop.is_set():
+            _disconnect(conn)
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append((conn, time.monotonic()))
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap_loop, name="netmiko-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def reap(self) -> None:
+        """Disconnect every session idle for longer than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        expired: List[Any] = []
+        with self._lock:
+            for key in list(self._idle):
+                keep = []
+                for conn, last_used in self._idle[key]:
+                    (keep if last_used >= cutoff else expired).append((conn, last_used))
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+        for conn, _ in expired:
+            _disconnect(conn)
+
+    def close(self) -> None:
+        """Stop the reaper and disconnect every idle session."""
+        self._stop.set()
+        with self._lock:
+            sessions = [conn for idle in self._idle.values() for conn, _ in idle]
+            self._idle.clear()
+        for conn in sessions:
+            _disconnect(conn)
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(self.ttl / 2):
+            self.reap()
+
+
+def _is_alive(conn: Any) -> bool:
+    try:
+        return bool(conn.is_alive())
+    except Exception:
+        return False
+
+
+def _disconnect(conn: Any) -> None:
+    try:
+        conn.disconnect()
+    except Exception as exc:
+        logger.debug("Error closing SSH session: %s", exc)
+
+
+# Shared by every CLI worker thread; configured and closed from the app lifespan.
+netmiko_pool = NetmikoPool()
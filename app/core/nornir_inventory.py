@@ -1,24 +1,24 @@
 """
-Custom Nornir inventory builder backed by PostgreSQL.
+Device inventory loader backed by PostgreSQL.
 
-Because Nornir uses a thread pool (not asyncio), we cannot make async DB
-calls from inside a Nornir task.  The solution: load all device data
-asynchronously *before* creating the Nornir object, convert each row to a
-plain Python dataclass (no SQLAlchemy ORM references), then build the
-Nornir Inventory from those plain objects in sync code.
+CLI backups run on worker threads (not asyncio), so we cannot make async DB
+calls from inside a backup task.  The solution: load all device data
+asynchronously *before* dispatching any work and convert each row to a
+plain Python dataclass (no SQLAlchemy ORM references) that is safe to hand
+to a thread.
 """
 import dataclasses
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 
 from cryptography.fernet import Fernet
-from nornir.core.inventory import Defaults, Groups, Host, Hosts, Inventory
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.config import Settings
-from app.models import Device, PlatformEnum
+from app.config import Settings, get_fernet
+from app.models import CredentialSet, Device, PlatformEnum, Site
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +35,30 @@ PLATFORM_TO_NETMIKO: Dict[str, str] = {
 # Platforms handled via REST/XML API (not CLI/Netmiko)
 API_PLATFORMS = {PlatformEnum.PANOS.value, PlatformEnum.FORTIOS.value}
 
+# Seconds a decrypted credential-set password is reused across jobs.
+_DECRYPT_TTL = 300.0
+
+# (credential set id, Fernet token) → (plaintext, expiry).  Keyed on the token
+# itself, so a changed password is a cache miss, never a stale hit.
+_decrypted: Dict[Tuple[int, str], Tuple[str, float]] = {}
+
+
+def _decrypt_password(cipher: Fernet, cred_id: int, token: str, now: float) -> str:
+    """
+    Decrypt a credential-set password, reusing a recent result.
+
+    Fernet verifies an HMAC and runs AES per call; many devices — and every
+    scheduled run — share the same few credential sets, so each token is
+    decrypted once per TTL rather than once per device per job.
+    """
+    key = (cred_id, token)
+    hit = _decrypted.get(key)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    password = cipher.decrypt(token.encode()).decode()
+    _decrypted[key] = (password, now + _DECRYPT_TTL)
+    return password
+
 
 @dataclasses.dataclass
 class DeviceData:
@@ -59,87 +83,78 @@ async def load_device_data(
     device_ids: Optional[List[int]] = None,
 ) -> List[DeviceData]:
     """
-    Asynchronously load devices (with site + credentials eagerly loaded),
+    Asynchronously load devices (joined to their site and credentials),
     decrypt passwords, and return a list of plain DeviceData instances.
 
+    Only the needed columns are selected, as plain row tuples — no ORM
+    Device/Site/CredentialSet objects or identity-map entries are built
+    just to be copied into DeviceData.
+
     Credential resolution order:
       1. Device-level CredentialSet (decrypted with Fernet)
       2. Global NET_USER_GLOBAL / NET_PASS_GLOBAL env vars
       3. None (caller must handle the missing-credential case)
     """
     query = (
-        select(Device)
-        .options(selectinload(Device.site), selectinload(Device.credential_set))
+        select(
+            Device.id,
+            Device.hostname,
+            Device.ip,
+            Device.platform,
+            Site.code,
+            Site.gitea_repo_name,
+            CredentialSet.id,
+            CredentialSet.username,
+            CredentialSet.encrypted_password,
+        )
+        .join(Site, Device.site_id == Site.id)
+        .outerjoin(CredentialSet, Device.credential_id == CredentialSet.id)
         .where(Device.enabled == True)
     )
     if device_ids:
         query = query.where(Device.id.in_(device_ids))
 
-    result = await session.execute(query)
-    rows = result.unique().scalars().all()
+    rows = (await session.execute(query)).all()
 
-    cipher = Fernet(settings.fernet_key.encode())
+    cipher = get_fernet(settings.fernet_key)
+    now = time.monotonic()
+    for key in [k for k, (_, expiry) in _decrypted.items() if expiry <= now]:
+        del _decrypted[key]
     devices: List[DeviceData] = []
 
-    for row in rows:
+    for (
+        device_id, hostname, ip, platform, site_code, gitea_repo_name,
+        cred_id, cred_username, encrypted_password,
+    ) in rows:
         username: Optional[str] = None
         password: Optional[str] = None
 
-        if row.credential_set:
-            username = row.credential_set.username
-            password = cipher.decrypt(
-                row.credential_set.encrypted_password.encode()
-            ).decode()
+        if cred_id is not None:
+            username = cred_username
+            password = _decrypt_password(cipher, cred_id, encrypted_password, now)
         elif settings.net_user_global and settings.net_pass_global:
             username = settings.net_user_global
             password = settings.net_pass_global
         # else: both remain None → caller marks device as failed
 
-        platform_val = row.platform.value
+        platform_val = platform.value
         netmiko_platform = PLATFORM_TO_NETMIKO.get(platform_val, platform_val)
 
         devices.append(
             DeviceData(
-                device_id=row.id,
-                hostname=row.hostname,
-                ip=row.ip,
+                device_id=device_id,
+                hostname=hostname,
+                ip=ip,
                 platform=platform_val,
                 netmiko_platform=netmiko_platform,
                 username=username,
                 password=password,
                 port=22,
-                site_code=row.site.code,
-                gitea_repo_name=row.site.gitea_repo_name,
+                site_code=site_code,
+                gitea_repo_name=gitea_repo_name,
                 is_api_device=platform_val in API_PLATFORMS,
             )
         )
 
     return devices
 
-
-def build_nornir_inventory(devices: List[DeviceData]) -> Inventory:
-    """
-    Build a Nornir Inventory from pre-loaded DeviceData objects.
-
-    Only CLI-capable devices (not panos/fortios) should be passed here.
-    """
-    hosts = Hosts()
-
-    for dev in devices:
-        hosts[dev.hostname] = Host(
-            name=dev.hostname,
-            hostname=dev.ip,
-            port=dev.port,
-            username=dev.username,
-            password=dev.password,
-            platform=dev.netmiko_platform,
-            data={
-                "device_id": dev.device_id,
-                "platform": dev.platform,
-                "site_code": dev.site_code,
-                "gitea_repo_name": dev.gitea_repo_name,
-            },
-        )
-        logger.debug("Added host %s (%s) to Nornir inventory", dev.hostname, dev.netmiko_platform)
-
-    return Inventory(hosts=hosts, groups=Groups(), defaults=Defaults())
@@ -13,6 +13,10 @@ logger = logging.getLogger(__name__)
 
 _scheduler: AsyncIOScheduler = AsyncIOScheduler(timezone="UTC")
 
+# DB connections opened at startup when schedules exist, so schedules that
+# fire together (e.g. hourly ones at :00) don't each wait on a fresh connect.
+_WARM_CONNECTIONS = 5
+
 
 def get_scheduler() -> AsyncIOScheduler:
     return _scheduler
@@ -39,35 +43,53 @@ def _apscheduler_job_id(schedule_id: int) -> str:
 async def _fire_scheduled_backup(schedule_id: int) -> None:
     """Create and run a BackupJob for the given schedule."""
     from datetime import datetime
-    from sqlalchemy import select, update as sa_update
-    from app.database import get_session_factory
+    from sqlalchemy import and_, insert, or_, select, update as sa_update
+    from app.database import get_background_session_factory
     from app.models import BackupSchedule, BackupJob, Device
 
-    factory = get_session_factory()
+    factory = get_background_session_factory()
 
     async with factory() as session:
-        sched_result = await session.execute(
-            select(BackupSchedule).where(BackupSchedule.id == schedule_id)
-        )
-        schedule = sched_result.scalars().first()
-        if not schedule or not schedule.enabled:
+        # One round trip: the schedule's name joined to the ids of every
+        # enabled device in scope (one NULL-id row when there are none).
+        rows = (
+            await session.execute(
+                select(BackupSchedule.name, Device.id)
+                .outerjoin(
+                    Device,
+                    and_(
+                        Device.enabled == True,
+                        or_(
+                            BackupSchedule.site_id.is_(None),
+                            Device.site_id == BackupSchedule.site_id,
+                        ),
+                    ),
+                )
+                .where(BackupSchedule.id == schedule_id, BackupSchedule.enabled == True)
+            )
+        ).all()
+        if not rows:
             logger.info("Schedule %d skipped (disabled or not found)", schedule_id)
             return
 
-        query = select(Device).where(Device.enabled == True)
-        if schedule.site_id:
-            query = query.where(Device.site_id == schedule.site_id)
-
-        devices = (await session.execute(query)).scalars().all()
-        if not devices:
+        schedule_name = rows[0][0]
+        device_ids = [device_id for _, device_id in rows if device_id is not None]
+        if not device_ids:
             logger.warning("Schedule %d: no enabled devices — skipping", schedule_id)
             return
 
-        db_job = BackupJob(
-            triggered_by=f"schedule:{schedule.name}",
-            total_devices=len(devices),
-        )
-        session.add(db_job)
+        # INSERT … RETURNING hands back the id without a flush/refresh; both
+        # writes go out in one commit.
+        job_id = (
+            await session.execute(
+                insert(BackupJob)
+                .values(
+                    triggered_by=f"schedule:{schedule_name}",
+                    total_devices=len(device_ids),
+                )
+                .returning(BackupJob.id)
+            )
+        ).scalar_one()
         await session.execute(
             sa_update(BackupSchedule)
             .where(BackupSchedule.id == schedule_id)
@@ -75,9 +97,6 @@ async def _fire_scheduled_backup(schedule_id: int) -> None:
         )
         await session.commit()
 
-        job_id = db_job.id
-        device_ids = [d.id for d in devices]
-
     logger.info(
         "Schedule %d triggered backup job %d for %d device(s)",
         schedule_id, job_id, len(device_ids),
@@ -117,7 +136,7 @@ def remove_schedule_job(schedule_id: int) -> None:
 async def load_and_start() -> None:
     """Load enabled schedules from DB and start the scheduler. Call from lifespan."""
     from sqlalchemy import select
-    from app.database import get_session_factory
+    from app.database import get_session_factory, warm_pool
     from app.models import BackupSchedule
 
     factory = get_session_factory()
@@ -131,6 +150,9 @@ async def load_and_start() -> None:
     for schedule in schedules:
         add_schedule_job(schedule)
 
+    if schedules:
+        await warm_pool(min(len(schedules), _WARM_CONNECTIONS))
+
     _scheduler.start()
     logger.info("APScheduler started with %d active schedule(s)", len(schedules))
 
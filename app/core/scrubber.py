@@ -14,25 +14,42 @@ PAN-OS       serial, uptime, app/threat/antivirus/wildfire version tags
 FortiOS      uuid=, timestamp=, lastupdate=, build=
 
 Common (all) NTP timestamps embedded in config lines (ISO-8601 style)
+
+Each platform's patterns are fused into one regex at import.  When the
+optional google-re2 package is installed, fused patterns RE2 can express are
+compiled with it — a linear-time automaton instead of a backtracking scan;
+any it cannot compile stay on the stdlib re engine.
 """
 import re
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Any, AnyStr, Dict, FrozenSet, List, Tuple, Union
+
+try:
+    import re2
+except ImportError:  # optional dependency
+    re2 = None
+
+from app.core.hashing import config_digest
 
 # Each entry is (regex_pattern, replacement_string).
-# re.MULTILINE is always applied; re.DOTALL only where noted.
+# Patterns are compiled without flags; one that needs a flag scopes it inline,
+# e.g. (?m:^...), so the rest of the fused regex keeps the default semantics.
 PatternList = List[Tuple[str, str]]
 
+# Line-oriented, so it needs neither DOTALL nor look-ahead (RE2-compatible).
+# The only pattern anchored to a line start, hence the only one with (?m:).
+_CRYPTO_PKI_BLOCK = r"(?m:^crypto pki certificate [^\n]+(?:\n+[^\S\n][^\n]*)*)"
+
 _PATTERNS: Dict[str, PatternList] = {
     "ios": [
-        # Use [^\n]+ so these never swallow past the end of the line,
-        # even when re.DOTALL is active for the crypto block below.
         (r"uptime is [^\n]+",                             "uptime is <removed>"),
         (r"Last configuration change at [^\n]+",          "Last configuration change at <removed>"),
         (r"ntp clock-period \d+",                         "ntp clock-period <removed>"),
         (r"Current configuration : \d+ bytes",            "Current configuration : <removed> bytes"),
-        # Multi-line crypto PKI certificate block — requires re.DOTALL.
+        # Multi-line crypto PKI certificate block: the header line plus every
+        # following indented line (blank lines between them included).
         (
-            r"^crypto pki certificate .+?(?=\n\S|\Z)",
+            _CRYPTO_PKI_BLOCK,
             "<crypto-pki-cert-block-removed>",
         ),
     ],
@@ -42,7 +59,7 @@ _PATTERNS: Dict[str, PatternList] = {
         (r"serial-number: \S+",                           "serial-number: <removed>"),
         (r"module-number: \d+",                           "module-number: <removed>"),
         (
-            r"^crypto pki certificate .+?(?=\n\S|\Z)",
+            _CRYPTO_PKI_BLOCK,
             "<crypto-pki-cert-block-removed>",
         ),
     ],
@@ -79,8 +96,110 @@ _PATTERNS: Dict[str, PatternList] = {
     ],
 }
 
-# Platforms whose certificate blocks span multiple lines
-_DOTALL_PLATFORMS = {"ios", "nxos"}
+
+# Leading literal of a pattern (after an optional (?m: and ^), up to the first
+# regex metacharacter: text that must appear in any config the pattern can
+# match.
+_LITERAL_PREFIX = re.compile(r"(?:\(\?m:)?\^?((?:[^\\\[\](){}.*+?|^$])*)")
+
+
+def _required_literal(pattern: str) -> str:
+    if "|" in pattern:
+        return ""  # an alternation may not need the prefix at all
+    m = _LITERAL_PREFIX.match(pattern)
+    literal = m.group(1)
+    if pattern[m.end():m.end() + 1] in ("?", "*", "+", "{"):
+        literal = literal[:-1]  # a quantifier makes the last char optional
+    return literal
+
+
+def _compile_fused(pattern: AnyStr) -> Any:
+    """Compile a fused pattern with RE2 if available and able, else with re."""
+    if re2 is not None:
+        options = re2.Options()
+        options.log_errors = False
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+
+def _entries(platform: str) -> PatternList:
+    """The platform's patterns followed by the common ones."""
+    return _PATTERNS.get(platform, []) + _PATTERNS["_common"]
+
+
+# platform → [(index into _entries(platform), required literal as str, as bytes)]
+# for patterns that have a literal to look for.  Patterns without one (the
+# common timestamp) are always applied.
+_KEYWORDS = {
+    platform: [
+        (i, literal, literal.encode("ascii"))
+        for i, (pattern, _) in enumerate(_entries(platform))
+        for literal in [_required_literal(pattern)]
+        if literal
+    ]
+    for platform in _PATTERNS
+}
+
+
+@lru_cache(maxsize=None)
+def _compile(
+    platform: str, skip: FrozenSet[int] = frozenset(), as_bytes: bool = False
+) -> Tuple[Any, Dict[Any, Any]]:
+    """
+    Fuse the platform's patterns and the common patterns into one regex.
+
+    Each pattern becomes a named alternative (?P<pN>...) and the replacement
+    is looked up by the name of the alternative that matched, so the config
+    is scanned once instead of once per pattern.  Replacements are literal
+    strings.  Patterns whose index is in *skip* are left out.  With
+    *as_bytes*, pattern and replacements are ASCII bytes, for scrubbing
+    UTF-8 payloads without decoding them.
+
+    Cached: each (platform, subset) combination is compiled once.
+    """
+    parts: List[str] = []
+    replacements: Dict[Any, Any] = {}
+    for i, (pattern, replacement) in enumerate(_entries(platform)):
+        if i in skip:
+            continue
+        name = f"p{i}"
+        parts.append(f"(?P<{name}>{pattern})")
+        if as_bytes:
+            # re reports lastgroup as str for bytes patterns, RE2 as bytes.
+            replacements[name] = replacements[name.encode("ascii")] = replacement.encode("ascii")
+        else:
+            replacements[name] = replacement
+    fused = "|".join(parts)
+    return _compile_fused(fused.encode("ascii") if as_bytes else fused), replacements
+
+
+def _compiled_for(raw: AnyStr, platform: str) -> Tuple[Any, Dict[Any, Any]]:
+    """
+    Return the fused regex for *platform*, minus every pattern whose required
+    literal does not occur in *raw*.
+
+    A substring test per keyword is a plain C scan, far cheaper than trying
+    each alternative at every offset, so patterns that cannot match —
+    typically most of them — are dropped before the regex pass.
+    """
+    if platform not in _PATTERNS or platform == "_common":
+        platform = "_common"
+    as_bytes = isinstance(raw, bytes)
+    skip = frozenset(
+        i
+        for i, literal, literal_bytes in _KEYWORDS[platform]
+        if (literal_bytes if as_bytes else literal) not in raw
+    )
+    return _compile(platform, skip, as_bytes)
+
+
+# Compile every platform's full pattern set, for str and bytes, at import.
+for _platform in _PATTERNS:
+    _compile(_platform)
+    _compile(_platform, as_bytes=True)
 
 
 def scrub_config(raw: str, platform: str) -> str:
@@ -98,20 +217,40 @@ def scrub_config(raw: str, platform: str) -> str:
     if not raw:
         return raw
 
-    scrubbed = raw
-    flags_base = re.MULTILINE
-    flags_dotall = re.MULTILINE | re.DOTALL
+    # Platform-specific and common patterns, applied in a single pass.
+    regex, replacements = _compiled_for(raw, platform)
+    scrubbed = regex.sub(lambda m: replacements[m.lastgroup], raw)
 
-    # Platform-specific patterns
-    for pattern, replacement in _PATTERNS.get(platform, []):
-        flags = flags_dotall if platform in _DOTALL_PLATFORMS else flags_base
-        scrubbed = re.sub(pattern, replacement, scrubbed, flags=flags)
+    return scrubbed.strip()
 
-    # Common patterns applied to every platform
-    for pattern, replacement in _PATTERNS["_common"]:
-        scrubbed = re.sub(pattern, replacement, scrubbed, flags=flags_base)
 
-    return scrubbed.strip()
+def scrub_config_bytes(raw: Union[str, bytes], platform: str) -> bytes:
+    """
+    scrub_config(), run over and returned as UTF-8 bytes.
+
+    The backup engine hashes and uploads bytes, and API devices deliver
+    them, so the patterns run directly on the encoded payload: no decode,
+    and a narrower buffer to scan than a str of the same config.  Text
+    input (Netmiko output) is encoded once first.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if not raw:
+        return raw
+
+    regex, replacements = _compiled_for(raw, platform)
+    return regex.sub(lambda m: replacements[m.lastgroup], raw).strip()
+
+
+def scrub_and_digest(raw: Union[str, bytes], platform: str) -> Tuple[bytes, bytes]:
+    """
+    Return (scrub_config_bytes(raw, platform), its config digest).
+
+    One call for the whole CPU-bound step, so it can be handed to a worker
+    thread or process as a unit.
+    """
+    scrubbed = scrub_config_bytes(raw, platform)
+    return scrubbed, config_digest(scrubbed)
 
 
 class ConfigScrubber:
@@ -1,33 +1,96 @@
+import asyncio
 import logging
+from sqlalchemy import DateTime, event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.sql.expression import FunctionElement
 from app.config import Settings
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+
+class utcnow(FunctionElement):
+    """
+    Current UTC time as a naive timestamp, evaluated by the database.
+
+    Used as server_default/onupdate for timestamp columns, which store naive
+    UTC like datetime.utcnow() did, so INSERTs don't carry a client-side
+    clock value.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC.
+    return "CURRENT_TIMESTAMP"
+
+
 _engine = None
 _session_factory = None
+# Backup jobs hold a session for their whole run; they get their own pool so
+# a burst of jobs cannot starve API requests of connections.
+_background_engine = None
+_background_session_factory = None
 
 
 async def init_db(settings: Settings) -> None:
-    """Initialize database engine and session factory."""
-    global _engine, _session_factory
-
-    _engine = create_async_engine(
-        settings.database_url,
-        echo=settings.debug,
-        pool_pre_ping=True,
-        pool_size=20,
-        max_overflow=10
-    )
+    """Initialize the request and background engines and session factories."""
+    global _engine, _session_factory, _background_engine, _background_session_factory
+
+    is_sqlite = settings.database_url.startswith("sqlite")
+    in_memory = is_sqlite and ":memory:" in settings.database_url
+    pre_ping = settings.db_pool_pre_ping
+    if pre_ping is None:
+        pre_ping = not is_sqlite
+
+    def engine(pool_size: int, max_overflow: int):
+        if is_sqlite:
+            # Single writer and no network round trip, so pooling buys
+            # nothing; an in-memory database must keep its one connection.
+            pool_args = {"poolclass": StaticPool if in_memory else NullPool}
+        else:
+            pool_args = {
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "pool_recycle": settings.db_pool_recycle,
+            }
+        new_engine = create_async_engine(
+            settings.database_url,
+            echo=settings.sql_echo,
+            pool_pre_ping=pre_ping,
+            **pool_args,
+        )
+        if is_sqlite:
+            event.listen(new_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+        return new_engine
+
+    _engine = engine(pool_size=20, max_overflow=10)
+    # An in-memory SQLite database exists only on its one connection, so
+    # background work has to share it.
+    _background_engine = _engine if in_memory else engine(pool_size=5, max_overflow=5)
 
     _session_factory = async_sessionmaker(
         _engine,
         class_=AsyncSession,
         expire_on_commit=False
     )
+    _background_session_factory = async_sessionmaker(
+        _background_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
 
     async with _engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -35,10 +98,35 @@ async def init_db(settings: Settings) -> None:
     logger.info("Database initialized and tables created")
 
 
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    # SQLite ignores FOREIGN KEY constraints unless asked, per connection; the
+    # routers rely on them to reject dangling site/credential ids.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+async def warm_pool(connections: int) -> None:
+    """
+    Open *connections* background-pool connections up front, concurrently.
+
+    They go back to the pool idle, so the first scheduled jobs after startup
+    skip the connect (and auth) round trips.
+    """
+    async def ping() -> None:
+        async with _background_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
 async def close_db() -> None:
     """Close database connections."""
-    global _engine
+    global _engine, _background_engine
 
+    if _background_engine is not None and _background_engine is not _engine:
+        await _background_engine.dispose()
+    _background_engine = None
     if _engine:
         await _engine.dispose()
         logger.info("Database connections closed")
@@ -51,11 +139,14 @@ def get_session_factory():
     return _session_factory
 
 
+def get_background_session_factory():
+    """Return the session factory for backup jobs and other background work."""
+    if _background_session_factory is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    return _background_session_factory
+
+
 async def get_db_session() -> AsyncSession:
     """Dependency for FastAPI to get async database session."""
-    factory = get_session_factory()
-    async with factory() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+    async with get_session_factory()() as session:
+        yield session
@@ -1,43 +1,97 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from sqlalchemy import update
 
-from app.config import get_settings, setup_logging
+from app.config import get_settings, setup_logging, stop_logging
 from app.database import init_db, close_db, get_session_factory
 from app.models import BackupJob, BackupJobStatus
 from app.routers import inventory, backups, dashboard
 from app.routers import schedules as schedules_router
+from app.core.backup_engine import shutdown_cli_executors, shutdown_scrub_pool
+from app.core.gitea_client import close_gitea_client
+from app.core.hashing import set_hash_algorithm
+from app.core.netmiko_pool import netmiko_pool
 from app.core.scheduler import load_and_start, stop as stop_scheduler
 
 logger = logging.getLogger(__name__)
 
 templates = Jinja2Templates(directory="app/templates")
+# Templates ship with the image; skip the per-render mtime check, and keep
+# compiled bytecode in the temp dir so a restart doesn't re-parse them.
+templates.env.auto_reload = False
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+
+_STATIC_PAGES = (
+    "dashboard.html",
+    "inventory.html",
+    "config_view.html",
+    "diff_view.html",
+    "device_status.html",
+    "schedules.html",
+)
+
+
+@lru_cache(maxsize=None)
+def _static_page(name: str) -> bytes:
+    """
+    Render a context-free page once and reuse the bytes.
+
+    Every page except the job detail is a static shell whose JS fetches its
+    data from the API, so there is nothing to render per request.
+    """
+    return templates.get_template(name).render().encode()
+
+
+def _check_event_loop(settings) -> None:
+    """The backup engine's fan-out assumes uvloop; flag anything else loudly."""
+    loop_type = type(asyncio.get_running_loop())
+    if loop_type.__module__.startswith("uvloop"):
+        return
+    if settings.debug:
+        logger.info("Running on %s event loop (debug mode)", loop_type.__name__)
+    else:
+        logger.error(
+            "Running on %s, not uvloop — start uvicorn with --loop uvloop",
+            loop_type.__name__,
+        )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
     setup_logging(settings)
+    _check_event_loop(settings)
+    set_hash_algorithm(settings.config_hash_algorithm)
+    netmiko_pool.ttl = settings.netmiko_session_ttl
     logger.info("Initialising database …")
     await init_db(settings)
     logger.info("Database ready")
 
+    # Compile every template (and render the static pages) before the first
+    # request rather than on it.
+    for name in _STATIC_PAGES:
+        _static_page(name)
+    templates.get_template("job_detail.html")
+
     # Mark any jobs left in RUNNING state as FAILED — they were orphaned by a restart.
     async with get_session_factory()() as session:
         result = await session.execute(
             update(BackupJob)
             .where(BackupJob.status == BackupJobStatus.RUNNING)
             .values(status=BackupJobStatus.FAILED, completed_at=datetime.utcnow())
-            .returning(BackupJob.id)
         )
-        orphaned = result.scalars().all()
         await session.commit()
-        if orphaned:
-            logger.warning("Marked %d orphaned RUNNING job(s) as FAILED: %s", len(orphaned), orphaned)
+        if result.rowcount:
+            logger.warning("Marked %d orphaned RUNNING job(s) as FAILED", result.rowcount)
 
     # Start APScheduler and load recurring backup schedules
     await load_and_start()
@@ -46,7 +100,12 @@ async def lifespan(app: FastAPI):
 
     logger.info("Shutting down …")
     stop_scheduler()
+    shutdown_cli_executors()
+    shutdown_scrub_pool()
+    netmiko_pool.close()
+    await close_gitea_client()
     await close_db()
+    stop_logging()
 
 
 app = FastAPI(
@@ -58,6 +117,13 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Pages, the stylesheet and JSON listings are highly compressible text.
+app.add_middleware(GZipMiddleware, minimum_size=512, compresslevel=5)
+
+# Shared stylesheet; served with ETag/Last-Modified so browsers revalidate
+# instead of re-downloading it inline with every page.
+app.mount("/static", StaticFiles(directory="app/static"), name="static")
+
 app.include_router(inventory.router)
 app.include_router(backups.router)
 app.include_router(dashboard.router)
@@ -75,13 +141,13 @@ async def home():
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page(request: Request):
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+async def dashboard_page():
+    return HTMLResponse(_static_page("dashboard.html"))
 
 
 @app.get("/inventory", response_class=HTMLResponse)
-async def inventory_page(request: Request):
-    return templates.TemplateResponse("inventory.html", {"request": request})
+async def inventory_page():
+    return HTMLResponse(_static_page("inventory.html"))
 
 
 @app.get("/job/{job_id}", response_class=HTMLResponse)
@@ -90,25 +156,25 @@ async def job_detail_page(request: Request, job_id: int):
 
 
 @app.get("/config", response_class=HTMLResponse)
-async def config_page(request: Request):
-    return templates.TemplateResponse("config_view.html", {"request": request})
+async def config_page():
+    return HTMLResponse(_static_page("config_view.html"))
 
 
 @app.get("/diff", response_class=HTMLResponse)
-async def diff_page(request: Request):
-    return templates.TemplateResponse("diff_view.html", {"request": request})
+async def diff_page():
+    return HTMLResponse(_static_page("diff_view.html"))
 
 
 @app.get("/device-status", response_class=HTMLResponse)
-async def device_status_page(request: Request):
-    return templates.TemplateResponse("device_status.html", {"request": request})
+async def device_status_page():
+    return HTMLResponse(_static_page("device_status.html"))
 
 
 @app.get("/schedules", response_class=HTMLResponse)
-async def schedules_page(request: Request):
-    return templates.TemplateResponse("schedules.html", {"request": request})
+async def schedules_page():
+    return HTMLResponse(_static_page("schedules.html"))
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop")
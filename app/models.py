@@ -1,11 +1,40 @@
 import enum
-from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, DateTime, ForeignKey, Boolean,
-    Enum, Text, Float, UniqueConstraint, Index
+    Column, Integer, SmallInteger, String, DateTime, ForeignKey, Boolean,
+    Enum, Text, Float, LargeBinary, UniqueConstraint, Index
 )
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, utcnow
+
+
+class EnumAsSmallInt(TypeDecorator):
+    """
+    Store a str Enum as a SMALLINT code, keeping the string values for the API.
+
+    Codes are the 1-based declaration order of the members, so new members
+    must only ever be appended.  Used for the hot, indexed enum columns,
+    where a 2-byte key keeps the B-tree far smaller than a text/ENUM one.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        self._members = (None,) + tuple(enum_class)
+        self._codes = {member: code for code, member in enumerate(self._members) if member}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._codes[self.enum_class(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
 
 
 class PlatformEnum(str, enum.Enum):
@@ -36,13 +65,14 @@ class Site(Base):
     """Network site/location."""
     __tablename__ = "sites"
     __table_args__ = (UniqueConstraint("code", name="uq_site_code"),)
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    code = Column(String(50), unique=True, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    code = Column(String(50), nullable=False)
     name = Column(String(255), nullable=False)
     gitea_repo_name = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     devices = relationship("Device", back_populates="site", cascade="all, delete-orphan")
 
@@ -50,13 +80,14 @@ class Site(Base):
 class CredentialSet(Base):
     """Stored credentials for device access."""
     __tablename__ = "credential_sets"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     label = Column(String(255), nullable=False, unique=True, index=True)
     username = Column(String(255), nullable=False)
     encrypted_password = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     devices = relationship("Device", back_populates="credential_set")
 
@@ -67,18 +98,21 @@ class Device(Base):
     __table_args__ = (
         UniqueConstraint("hostname", "site_id", name="uq_device_hostname_site"),
         Index("idx_device_platform", "platform"),
-        Index("idx_device_site", "site_id"),
+        # Serves the scheduler/backup "enabled devices of a site" lookup and,
+        # as a prefix, every plain site_id filter (inventory, FK checks).
+        Index("idx_device_site_enabled", "site_id", "enabled"),
     )
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     hostname = Column(String(255), nullable=False)
     ip = Column(String(45), nullable=False)
-    platform = Column(Enum(PlatformEnum), nullable=False, index=True)
-    site_id = Column(Integer, ForeignKey("sites.id"), nullable=False, index=True)
+    platform = Column(EnumAsSmallInt(PlatformEnum), nullable=False)
+    site_id = Column(Integer, ForeignKey("sites.id"), nullable=False)
     credential_id = Column(Integer, ForeignKey("credential_sets.id"), nullable=True)
     enabled = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     site = relationship("Site", back_populates="devices")
     credential_set = relationship("CredentialSet", back_populates="devices")
@@ -89,11 +123,12 @@ class BackupJob(Base):
     """Backup job tracking."""
     __tablename__ = "backup_jobs"
     __table_args__ = (Index("idx_backup_job_status", "status"),)
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    triggered_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    id = Column(Integer, primary_key=True)
+    triggered_at = Column(DateTime, server_default=utcnow(), nullable=False)
     triggered_by = Column(String(255), nullable=False)
-    status = Column(Enum(BackupJobStatus), default=BackupJobStatus.RUNNING, index=True)
+    status = Column(EnumAsSmallInt(BackupJobStatus), default=BackupJobStatus.RUNNING)
     total_devices = Column(Integer, nullable=False)
     completed_devices = Column(Integer, default=0)
     failed_devices = Column(Integer, default=0)
@@ -113,15 +148,16 @@ class ScheduleFrequency(str, enum.Enum):
 class BackupSchedule(Base):
     """Recurring backup schedule."""
     __tablename__ = "backup_schedules"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     frequency = Column(Enum(ScheduleFrequency), nullable=False)
     hour = Column(Integer, default=2)           # 0-23 (daily/weekly)
     day_of_week = Column(Integer, default=0)    # 0=Mon … 6=Sun (weekly only)
     site_id = Column(Integer, ForeignKey("sites.id"), nullable=True)
     enabled = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
     last_run_at = Column(DateTime, nullable=True)
 
     site = relationship("Site")
@@ -131,20 +167,23 @@ class BackupResult(Base):
     """Individual device backup result within a job."""
     __tablename__ = "backup_results"
     __table_args__ = (
-        Index("idx_backup_result_job", "job_id"),
+        # Per-job lookups and status counts; leads with job_id, so it also
+        # serves every plain job_id filter.
+        Index("idx_backup_result_job_status", "job_id", "status", "device_id"),
         Index("idx_backup_result_device", "device_id"),
         Index("idx_backup_result_status", "status"),
     )
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("backup_jobs.id"), nullable=False, index=True)
-    device_id = Column(Integer, ForeignKey("devices.id"), nullable=False, index=True)
-    status = Column(Enum(BackupResultStatus), nullable=False)
-    config_hash = Column(String(64), nullable=True)
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("backup_jobs.id"), nullable=False)
+    device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
+    status = Column(EnumAsSmallInt(BackupResultStatus), nullable=False)
+    config_hash = Column(LargeBinary(32), nullable=True)
     gitea_commit_sha = Column(String(40), nullable=True)
     error_message = Column(Text, nullable=True)
     duration_seconds = Column(Float, nullable=True)
-    backed_up_at = Column(DateTime, default=datetime.utcnow)
+    backed_up_at = Column(DateTime, server_default=utcnow())
 
     job = relationship("BackupJob", back_populates="results")
     device = relationship("Device", back_populates="backup_results")
@@ -3,8 +3,8 @@ import asyncio
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, desc, exists
+from sqlalchemy.orm import joinedload, selectinload
 from typing import List
 
 from app.database import get_db_session
@@ -16,7 +16,7 @@ from app.schemas import (
     DiffResponse,
 )
 from app.core.backup_engine import BackupEngine
-from app.core.gitea_client import GiteaClient
+from app.core.gitea_client import get_gitea_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/backups", tags=["backups"])
@@ -31,19 +31,18 @@ async def create_backup_job(
     session: AsyncSession = Depends(get_db_session),
 ):
     """Trigger a new backup job (all sites, or a specific site)."""
-    query = select(Device).where(Device.enabled == True)
+    query = select(Device.id).where(Device.enabled == True)
     if job_create.site_id:
         query = query.where(Device.site_id == job_create.site_id)
 
-    result = await session.execute(query)
-    devices = result.scalars().all()
+    device_ids = (await session.scalars(query)).all()
 
-    if not devices:
+    if not device_ids:
         raise HTTPException(status_code=400, detail="No enabled devices found to back up")
 
     db_job = BackupJob(
         triggered_by=job_create.triggered_by,
-        total_devices=len(devices),
+        total_devices=len(device_ids),
     )
     session.add(db_job)
     await session.commit()
@@ -55,12 +54,12 @@ async def create_backup_job(
     )
     db_job = result.scalars().first()
 
-    logger.info("Created backup job %d for %d devices", db_job.id, len(devices))
+    logger.info("Created backup job %d for %d devices", db_job.id, len(device_ids))
 
     background_tasks.add_task(
         _run_backup_engine,
         job_id=db_job.id,
-        device_ids=[d.id for d in devices],
+        device_ids=device_ids,
     )
 
     return db_job
@@ -68,9 +67,9 @@ async def create_backup_job(
 
 async def _run_backup_engine(job_id: int, device_ids: List[int]) -> None:
     """Background task: obtain a fresh DB session and run the backup engine."""
-    from app.database import get_session_factory
+    from app.database import get_background_session_factory
 
-    factory = get_session_factory()
+    factory = get_background_session_factory()
     async with factory() as session:
         engine = BackupEngine(session=session)
         await engine.run_backup(job_id=job_id, device_ids=device_ids)
@@ -130,17 +129,14 @@ async def rerun_backup_job(
     session: AsyncSession = Depends(get_db_session),
 ):
     """Create a new backup job targeting the same devices as a previous job."""
-    result = await session.execute(
-        select(BackupJob)
-        .options(selectinload(BackupJob.results))
-        .where(BackupJob.id == job_id)
-    )
-    original_job = result.scalars().first()
-    if not original_job:
-        raise HTTPException(status_code=404, detail="Backup job not found")
-
-    device_ids = list({r.device_id for r in original_job.results})
+    device_ids = (
+        await session.scalars(
+            select(BackupResult.device_id).where(BackupResult.job_id == job_id).distinct()
+        )
+    ).all()
     if not device_ids:
+        if not await session.scalar(select(exists().where(BackupJob.id == job_id))):
+            raise HTTPException(status_code=404, detail="Backup job not found")
         raise HTTPException(status_code=400, detail="Original job has no device results to re-run")
 
     db_job = BackupJob(
@@ -211,7 +207,7 @@ async def get_device_backup_history(
 async def get_device_config(device_id: int, session: AsyncSession = Depends(get_db_session)):
     """Return the latest backed-up config text for a device."""
     device_result = await session.execute(
-        select(Device).options(selectinload(Device.site)).where(Device.id == device_id)
+        select(Device).options(joinedload(Device.site, innerjoin=True)).where(Device.id == device_id)
     )
     device = device_result.scalars().first()
     if not device:
@@ -219,7 +215,7 @@ async def get_device_config(device_id: int, session: AsyncSession = Depends(get_
 
     from app.config import get_settings
     settings = get_settings()
-    gitea = GiteaClient(settings.gitea_url, settings.gitea_token, settings.gitea_org)
+    gitea = get_gitea_client(settings)
     repo_full = f"{settings.gitea_org}/{device.site.gitea_repo_name}"
 
     try:
@@ -240,10 +236,11 @@ async def get_device_diff(
     device_id: int, session: AsyncSession = Depends(get_db_session)
 ):
     """Return the unified diff between the two most recent backups for a device."""
-    # Eagerly load the site relationship to avoid lazy-load errors in async context
+    # Join the site in the same query: no lazy load (not allowed in async)
+    # and no second SELECT as selectinload would issue.
     device_result = await session.execute(
         select(Device)
-        .options(selectinload(Device.site))
+        .options(joinedload(Device.site, innerjoin=True))
         .where(Device.id == device_id)
     )
     device = device_result.scalars().first()
@@ -252,7 +249,7 @@ async def get_device_diff(
 
     from app.config import get_settings
     settings = get_settings()
-    gitea = GiteaClient(settings.gitea_url, settings.gitea_token, settings.gitea_org)
+    gitea = get_gitea_client(settings)
     repo_full = f"{settings.gitea_org}/{device.site.gitea_repo_name}"
 
     try:
@@ -4,7 +4,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 # Import the single shared progress-queue registry from the backup engine.
 # Do NOT rebind this name — that would disconnect the WebSocket from the engine.
-from app.core.backup_engine import progress_queues
+from app.core.backup_engine import get_progress_channel, progress_queues
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["dashboard"])
@@ -20,16 +20,16 @@ async def websocket_job_progress(websocket: WebSocket, job_id: int) -> None:
     """
     await websocket.accept()
 
-    # Ensure a queue exists for this job (idempotent).
-    if job_id not in progress_queues:
-        progress_queues[job_id] = asyncio.Queue()
-    queue: asyncio.Queue = progress_queues[job_id]
+    # Ensure a channel exists for this job (idempotent).
+    queue = get_progress_channel(job_id)
 
     try:
         while True:
             try:
                 # Wait up to 30 s for the next event; send a keepalive if idle.
-                message = await asyncio.wait_for(queue.get(), timeout=30.0)
+                # Messages are full snapshots, so whatever piled up during
+                # the last send collapses into one frame with the newest.
+                message = await asyncio.wait_for(queue.get_latest(), timeout=30.0)
                 await websocket.send_json(message)
 
                 # Stop streaming once the job reaches a terminal state.
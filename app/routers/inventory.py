@@ -1,10 +1,12 @@
 import logging
 import math
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, or_
+from sqlalchemy import select, and_, exists, func, or_, true
 from typing import List, Optional
 
+from app.core.cache import TTLCache
 from app.database import get_db_session
 from app.models import Site, Device, CredentialSet, BackupResult
 from app.schemas import (
@@ -17,19 +19,27 @@ from app.schemas import (
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["inventory"])
 
+# Site, credential and device listings, keyed by endpoint (and filter).
+# Every inventory write clears the whole cache: sites cascade to devices,
+# and writes are rare next to the UI's list polling.
+_LIST_CACHE_TTL = 30.0
+_list_cache = TTLCache(_LIST_CACHE_TTL)
+
 
 # ==================== SITES ====================
 
 @router.post("/sites", response_model=SiteResponse, status_code=status.HTTP_201_CREATED)
 async def create_site(site: SiteCreate, session: AsyncSession = Depends(get_db_session)):
     """Create a new site."""
-    existing = await session.execute(select(Site).where(Site.code == site.code))
-    if existing.scalars().first():
-        raise HTTPException(status_code=400, detail="Site with this code already exists")
-
+    # uq_site_code rejects duplicates; no pre-check round trip.
     db_site = Site(**site.model_dump())
     session.add(db_site)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Site with this code already exists")
+    _list_cache.clear()
     await session.refresh(db_site)
     logger.info(f"Created site: {db_site.code}")
     return db_site
@@ -38,8 +48,13 @@ async def create_site(site: SiteCreate, session: AsyncSession = Depends(get_db_s
 @router.get("/sites", response_model=List[SiteResponse])
 async def list_sites(session: AsyncSession = Depends(get_db_session)):
     """List all sites."""
-    result = await session.execute(select(Site).order_by(Site.code))
-    return result.scalars().all()
+    sites = _list_cache.get("sites")
+    if sites is None:
+        generation = _list_cache.generation
+        result = await session.execute(select(Site).order_by(Site.code))
+        sites = [SiteResponse.model_validate(s) for s in result.scalars()]
+        _list_cache.set("sites", sites, generation)
+    return sites
 
 
 @router.get("/sites/{site_id}", response_model=SiteResponse)
@@ -65,6 +80,7 @@ async def update_site(site_id: int, site_update: SiteUpdate, session: AsyncSessi
         setattr(site, key, value)
 
     await session.commit()
+    _list_cache.clear()
     await session.refresh(site)
     logger.info(f"Updated site: {site.code}")
     return site
@@ -80,6 +96,7 @@ async def delete_site(site_id: int, session: AsyncSession = Depends(get_db_sessi
 
     await session.delete(site)
     await session.commit()
+    _list_cache.clear()
     logger.info(f"Deleted site: {site.code}")
 
 
@@ -88,16 +105,9 @@ async def delete_site(site_id: int, session: AsyncSession = Depends(get_db_sessi
 @router.post("/credentials", response_model=CredentialSetResponse, status_code=status.HTTP_201_CREATED)
 async def create_credential_set(cred: CredentialSetCreate, session: AsyncSession = Depends(get_db_session)):
     """Create a new credential set."""
-    from cryptography.fernet import Fernet
-    from app.config import get_settings
-
-    settings = get_settings()
-    cipher = Fernet(settings.fernet_key.encode())
-    encrypted_pwd = cipher.encrypt(cred.password.encode()).decode()
+    from app.config import get_fernet
 
-    existing = await session.execute(select(CredentialSet).where(CredentialSet.label == cred.label))
-    if existing.scalars().first():
-        raise HTTPException(status_code=400, detail="Credential set with this label already exists")
+    encrypted_pwd = get_fernet().encrypt(cred.password.encode()).decode()
 
     db_cred = CredentialSet(
         label=cred.label,
@@ -105,7 +115,12 @@ async def create_credential_set(cred: CredentialSetCreate, session: AsyncSession
         encrypted_password=encrypted_pwd
     )
     session.add(db_cred)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Credential set with this label already exists")
+    _list_cache.clear()
     await session.refresh(db_cred)
     logger.info(f"Created credential set: {db_cred.label}")
     return db_cred
@@ -114,8 +129,13 @@ async def create_credential_set(cred: CredentialSetCreate, session: AsyncSession
 @router.get("/credentials", response_model=List[CredentialSetResponse])
 async def list_credentials(session: AsyncSession = Depends(get_db_session)):
     """List all credential sets."""
-    result = await session.execute(select(CredentialSet).order_by(CredentialSet.label))
-    return result.scalars().all()
+    creds = _list_cache.get("credentials")
+    if creds is None:
+        generation = _list_cache.generation
+        result = await session.execute(select(CredentialSet).order_by(CredentialSet.label))
+        creds = [CredentialSetResponse.model_validate(c) for c in result.scalars()]
+        _list_cache.set("credentials", creds, generation)
+    return creds
 
 
 @router.get("/credentials/{cred_id}", response_model=CredentialSetResponse)
@@ -135,8 +155,7 @@ async def update_credential_set(
     session: AsyncSession = Depends(get_db_session)
 ):
     """Update a credential set."""
-    from cryptography.fernet import Fernet
-    from app.config import get_settings
+    from app.config import get_fernet
 
     result = await session.execute(select(CredentialSet).where(CredentialSet.id == cred_id))
     cred = result.scalars().first()
@@ -147,12 +166,11 @@ async def update_credential_set(
         cred.username = cred_update.username
 
     if cred_update.password:
-        settings = get_settings()
-        cipher = Fernet(settings.fernet_key.encode())
-        encrypted_pwd = cipher.encrypt(cred_update.password.encode()).decode()
+        encrypted_pwd = get_fernet().encrypt(cred_update.password.encode()).decode()
         cred.encrypted_password = encrypted_pwd
 
     await session.commit()
+    _list_cache.clear()
     await session.refresh(cred)
     logger.info(f"Updated credential set: {cred.label}")
     return cred
@@ -168,6 +186,7 @@ async def delete_credential_set(cred_id: int, session: AsyncSession = Depends(ge
 
     await session.delete(cred)
     await session.commit()
+    _list_cache.clear()
     logger.info(f"Deleted credential set: {cred.label}")
 
 
@@ -176,26 +195,21 @@ async def delete_credential_set(cred_id: int, session: AsyncSession = Depends(ge
 @router.post("/devices", response_model=DeviceResponse, status_code=status.HTTP_201_CREATED)
 async def create_device(device: DeviceCreate, session: AsyncSession = Depends(get_db_session)):
     """Create a new device."""
-    site_result = await session.execute(select(Site).where(Site.id == device.site_id))
-    if not site_result.scalars().first():
-        raise HTTPException(status_code=404, detail="Site not found")
-
-    if device.credential_id:
-        cred_result = await session.execute(select(CredentialSet).where(CredentialSet.id == device.credential_id))
-        if not cred_result.scalars().first():
-            raise HTTPException(status_code=404, detail="Credential set not found")
-
-    existing = await session.execute(
-        select(Device).where(
-            and_(Device.hostname == device.hostname, Device.site_id == device.site_id)
-        )
-    )
-    if existing.scalars().first():
-        raise HTTPException(status_code=400, detail="Device with this hostname already exists in this site")
-
+    # The foreign keys and uq_device_hostname_site do the checking; the
+    # lookups only run to explain a rejected insert.
     db_device = Device(**device.model_dump())
     session.add(db_device)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        conflict = await _device_conflict(
+            session, device.site_id, device.credential_id, device.hostname
+        )
+        if conflict is None:
+            raise
+        raise conflict
+    _list_cache.clear()
     await session.refresh(db_device)
     logger.info(f"Created device: {db_device.hostname}")
     return db_device
@@ -204,11 +218,17 @@ async def create_device(device: DeviceCreate, session: AsyncSession = Depends(ge
 @router.get("/devices", response_model=List[DeviceResponse])
 async def list_devices(site_id: int | None = None, session: AsyncSession = Depends(get_db_session)):
     """List all devices, optionally filtered by site."""
-    query = select(Device)
-    if site_id:
-        query = query.where(Device.site_id == site_id)
-    result = await session.execute(query.order_by(Device.hostname))
-    return result.scalars().all()
+    key = ("devices", site_id or None)
+    devices = _list_cache.get(key)
+    if devices is None:
+        generation = _list_cache.generation
+        query = select(Device)
+        if site_id:
+            query = query.where(Device.site_id == site_id)
+        result = await session.execute(query.order_by(Device.hostname))
+        devices = [DeviceResponse.model_validate(d) for d in result.scalars()]
+        _list_cache.set(key, devices, generation)
+    return devices
 
 
 @router.get("/devices/status", response_model=DeviceStatusPage)
@@ -322,26 +342,66 @@ async def update_device(device_id: int, device_update: DeviceUpdate, session: As
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
 
-    if device_update.site_id:
-        site_result = await session.execute(select(Site).where(Site.id == device_update.site_id))
-        if not site_result.scalars().first():
-            raise HTTPException(status_code=404, detail="Site not found")
-
-    if device_update.credential_id:
-        cred_result = await session.execute(select(CredentialSet).where(CredentialSet.id == device_update.credential_id))
-        if not cred_result.scalars().first():
-            raise HTTPException(status_code=404, detail="Credential set not found")
-
     update_data = device_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(device, key, value)
-
-    await session.commit()
+    # Captured now: the rollback below expires the instance.
+    site_id, credential_id, hostname = device.site_id, device.credential_id, device.hostname
+
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        conflict = await _device_conflict(
+            session, site_id, credential_id, hostname, exclude_id=device_id
+        )
+        if conflict is None:
+            raise
+        raise conflict
+    _list_cache.clear()
     await session.refresh(device)
     logger.info(f"Updated device: {device.hostname}")
     return device
 
 
+async def _device_conflict(
+    session: AsyncSession,
+    site_id: int,
+    credential_id: Optional[int],
+    hostname: str,
+    exclude_id: Optional[int] = None,
+) -> Optional[HTTPException]:
+    """
+    Map a device INSERT/UPDATE rejected by a constraint to an HTTP error.
+
+    Only runs after an IntegrityError, so the common path stays a single
+    statement.  Returns None if no known constraint explains the failure.
+    """
+    duplicate = and_(Device.hostname == hostname, Device.site_id == site_id)
+    if exclude_id is not None:
+        duplicate = and_(duplicate, Device.id != exclude_id)
+
+    # All three checks in one round trip.
+    site_found, cred_found, taken = (
+        await session.execute(
+            select(
+                exists().where(Site.id == site_id),
+                exists().where(CredentialSet.id == credential_id) if credential_id else true(),
+                exists().where(duplicate),
+            )
+        )
+    ).one()
+
+    if not site_found:
+        return HTTPException(status_code=404, detail="Site not found")
+    if not cred_found:
+        return HTTPException(status_code=404, detail="Credential set not found")
+    if taken:
+        return HTTPException(status_code=400, detail="Device with this hostname already exists in this site")
+
+    return None
+
+
 @router.delete("/devices/{device_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_device(device_id: int, session: AsyncSession = Depends(get_db_session)):
     """Delete a device."""
@@ -352,4 +412,5 @@ async def delete_device(device_id: int, session: AsyncSession = Depends(get_db_s
 
     await session.delete(device)
     await session.commit()
+    _list_cache.clear()
     logger.info(f"Deleted device: {device.hostname}")
@@ -1,7 +1,7 @@
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from typing import List
 
 from app.database import get_db_session
@@ -23,10 +23,8 @@ async def list_schedules(session: AsyncSession = Depends(get_db_session)):
 @router.post("", response_model=BackupScheduleResponse, status_code=status.HTTP_201_CREATED)
 async def create_schedule(data: BackupScheduleCreate, session: AsyncSession = Depends(get_db_session)):
     """Create a new recurring backup schedule."""
-    if data.site_id:
-        site = (await session.execute(select(Site).where(Site.id == data.site_id))).scalars().first()
-        if not site:
-            raise HTTPException(status_code=404, detail="Site not found")
+    if data.site_id and not await session.scalar(select(exists().where(Site.id == data.site_id))):
+        raise HTTPException(status_code=404, detail="Site not found")
 
     schedule = BackupSchedule(**data.model_dump())
     session.add(schedule)
@@ -52,10 +50,10 @@ async def update_schedule(
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
 
-    if data.site_id is not None:
-        site = (await session.execute(select(Site).where(Site.id == data.site_id))).scalars().first()
-        if not site:
-            raise HTTPException(status_code=404, detail="Site not found")
+    if data.site_id is not None and not await session.scalar(
+        select(exists().where(Site.id == data.site_id))
+    ):
+        raise HTTPException(status_code=404, detail="Site not found")
 
     for key, value in data.model_dump(exclude_unset=True).items():
         setattr(schedule, key, value)
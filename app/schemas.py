@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -130,6 +130,12 @@ class BackupResultResponse(BaseModel):
     duration_seconds: Optional[float] = None
     backed_up_at: datetime
 
+    @field_validator("config_hash", mode="before")
+    @classmethod
+    def _hex_config_hash(cls, value):
+        # Stored as the raw 32-byte digest; exposed as hex.
+        return value.hex() if isinstance(value, bytes) else value
+
     class Config:
         from_attributes = True
 
@@ -0,0 +1,75 @@
+"""
+Unit tests for the in-process primitives in app/core/backup_engine.py.
+
+No network access required; the result-writer tests use the in-memory SQLite
+session from conftest.
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.core import backup_engine
+from app.core.backup_engine import BackupEngine, ProgressChannel, _result_row
+from app.models import BackupResult, BackupResultStatus
+
+
+class TestProgressChannel:
+    async def test_preserves_fifo_order(self):
+        channel = ProgressChannel()
+        channel.put({"completed": 1})
+        channel.put({"completed": 2})
+        assert await channel.get() == {"completed": 1}
+        assert await channel.get() == {"completed": 2}
+
+    async def test_get_waits_for_put(self):
+        channel = ProgressChannel()
+        waiter = asyncio.create_task(channel.get())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        channel.put({"status": "complete"})
+        assert await asyncio.wait_for(waiter, timeout=1) == {"status": "complete"}
+
+    async def test_bounded_keeps_newest(self):
+        channel = ProgressChannel(maxlen=3)
+        for n in range(10):
+            channel.put({"completed": n})
+        assert [(await channel.get())["completed"] for _ in range(3)] == [7, 8, 9]
+
+    async def test_get_latest_skips_backlog(self):
+        channel = ProgressChannel()
+        for n in range(5):
+            channel.put({"completed": n})
+        assert await channel.get_latest() == {"completed": 4}
+        channel.put({"status": "complete"})
+        assert await channel.get_latest() == {"status": "complete"}
+
+    async def test_cancelled_get_loses_nothing(self):
+        channel = ProgressChannel()
+        try:
+            await asyncio.wait_for(channel.get(), timeout=0.01)
+        except asyncio.TimeoutError:
+            pass
+        channel.put({"completed": 3})
+        assert await channel.get() == {"completed": 3}
+
+
+class TestFlushResults:
+    async def test_bad_row_recorded_failed_without_losing_batch(
+        self, monkeypatch, test_db_session, test_settings, sample_device, sample_backup_job,
+    ):
+        monkeypatch.setattr(backup_engine, "get_gitea_client", lambda settings: None)
+        engine = BackupEngine(test_db_session, test_settings)
+        job = sample_backup_job
+        good = _result_row(job.id, sample_device.id, BackupResultStatus.SUCCESS, config_hash=b"\x01" * 32)
+        bad = _result_row(job.id, sample_device.id, BackupResultStatus.SUCCESS, config_hash=object())
+
+        await engine._flush_results(job, [good, bad])
+        await engine.aclose()
+
+        statuses = (await test_db_session.execute(
+            select(BackupResult.status).order_by(BackupResult.id)
+        )).scalars().all()
+        assert statuses == [BackupResultStatus.SUCCESS, BackupResultStatus.FAILED]
+        await test_db_session.refresh(job)
+        assert (job.completed_devices, job.failed_devices) == (2, 1)
+        assert engine._failed == 1
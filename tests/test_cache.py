@@ -0,0 +1,32 @@
+"""
+Unit tests for app/core/cache.py.
+
+No network or DB access required.
+"""
+from app.core import cache
+from app.core.cache import TTLCache
+
+
+class TestTTLCache:
+    def test_returns_stored_value(self):
+        c = TTLCache(ttl=30)
+        c.set("sites", ["a"], c.generation)
+        assert c.get("sites") == ["a"]
+        assert c.get("devices") is None
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+        c = TTLCache(ttl=30)
+        c.set("sites", ["a"], c.generation)
+        now[0] += 29
+        assert c.get("sites") == ["a"]
+        now[0] += 1
+        assert c.get("sites") is None
+
+    def test_clear_drops_reads_in_flight(self):
+        c = TTLCache(ttl=30)
+        generation = c.generation  # reader starts its query …
+        c.clear()                  # … a write commits meanwhile
+        c.set("sites", ["stale"], generation)
+        assert c.get("sites") is None
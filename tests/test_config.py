@@ -0,0 +1,42 @@
+"""
+Unit tests for app/config.py.
+
+No network or DB access required.
+"""
+import pytest
+from cryptography.fernet import Fernet
+
+from app.config import get_fernet, get_settings
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    """Populate the required env vars and reset the settings cache around the test."""
+    monkeypatch.setenv("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    monkeypatch.setenv("GITEA_URL", "http://localhost:3000")
+    monkeypatch.setenv("GITEA_TOKEN", "test-token")
+    monkeypatch.setenv("FERNET_KEY", Fernet.generate_key().decode())
+    get_settings.cache_clear()
+    get_fernet.cache_clear()
+    yield
+    get_settings.cache_clear()
+    get_fernet.cache_clear()
+
+
+class TestGetSettings:
+    def test_returns_singleton(self, settings_env):
+        assert get_settings() is get_settings()
+
+    def test_reads_environment(self, settings_env):
+        assert get_settings().gitea_token == "test-token"
+
+
+class TestGetFernet:
+    def test_cached_per_key(self, settings_env):
+        key = Fernet.generate_key().decode()
+        assert get_fernet(key) is get_fernet(key)
+        assert get_fernet() is get_fernet()
+
+    def test_default_uses_configured_key(self, settings_env):
+        token = get_fernet().encrypt(b"secret")
+        assert Fernet(get_settings().fernet_key.encode()).decrypt(token) == b"secret"
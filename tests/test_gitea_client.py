@@ -0,0 +1,179 @@
+"""
+Unit tests for app/core/gitea_client.py.
+
+Gitea is replaced by an httpx.MockTransport — no network required.
+"""
+import asyncio
+import json
+from base64 import b64decode
+
+import httpx
+import pytest
+
+from app.core.gitea_client import GiteaClient
+
+
+def _client_with(handler) -> GiteaClient:
+    gitea = GiteaClient("http://gitea:3000", "test-token", "agncf")
+    gitea._client = httpx.AsyncClient(
+        base_url="http://gitea:3000/api/v1",
+        transport=httpx.MockTransport(handler),
+    )
+    return gitea
+
+
+class TestEnsureRepo:
+    async def test_concurrent_calls_hit_gitea_once(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={})
+
+        gitea = _client_with(handler)
+        results = await asyncio.gather(
+            *[gitea.ensure_repo("SITE-A", "site-a") for _ in range(10)]
+        )
+        await gitea.aclose()
+
+        assert results == ["agncf/site-a"] * 10
+        assert len(requests) == 1
+
+    async def test_forget_repo_rechecks(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={})
+
+        gitea = _client_with(handler)
+        await gitea.ensure_repo("SITE-A", "site-a")
+        gitea.forget_repo("site-a")
+        await gitea.ensure_repo("SITE-A", "site-a")
+        await gitea.aclose()
+
+        assert len(requests) == 2
+
+
+class TestCommitConfigsBulk:
+    async def test_single_commit_with_create_and_update(self):
+        posted = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                return httpx.Response(200, json=[
+                    {"name": "sw1.txt", "type": "file", "sha": "old-sha"},
+                    {"name": "README.md", "type": "file", "sha": "readme-sha"},
+                ])
+            posted.append(json.loads(request.content))
+            return httpx.Response(201, json={"commit": {"sha": "new-commit"}})
+
+        gitea = _client_with(handler)
+        shas = await gitea.commit_configs_bulk(
+            "agncf/site-a", {"sw1": b"hostname sw1", "sw2": b"hostname sw2"}, "msg",
+        )
+        await gitea.aclose()
+
+        assert shas == {"sw1": "new-commit", "sw2": "new-commit"}
+        assert len(posted) == 1
+        files = {f["path"]: f for f in posted[0]["files"]}
+        assert files["sw1.txt"]["operation"] == "update"
+        assert files["sw1.txt"]["sha"] == "old-sha"
+        assert files["sw2.txt"]["operation"] == "create"
+        assert b64decode(files["sw2.txt"]["content"]) == b"hostname sw2"
+
+    async def test_large_config_round_trips(self):
+        posted = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                return httpx.Response(200, json=[])
+            posted.append(json.loads(request.content))
+            return httpx.Response(201, json={"commit": {"sha": "c"}})
+
+        config = b"interface Gi0/1\n" * 20000  # above the thread-offload threshold
+        gitea = _client_with(handler)
+        await gitea.commit_configs_bulk("agncf/site-a", {"sw1": config}, "msg")
+        await gitea.aclose()
+
+        assert b64decode(posted[0]["files"][0]["content"]) == config
+
+    @pytest.mark.parametrize("post_status", [404, 405])
+    async def test_falls_back_to_per_file_commits(self, post_status):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/v1/repos/agncf/site-a/contents":
+                if request.method == "GET":
+                    return httpx.Response(200, json=[])
+                return httpx.Response(post_status)
+            if request.method == "GET":
+                return httpx.Response(404)
+            return httpx.Response(201, json={"commit": {"sha": "per-file"}})
+
+        gitea = _client_with(handler)
+        shas = await gitea.commit_configs_bulk("agncf/site-a", {"sw1": b"x"}, "msg")
+        await gitea.aclose()
+
+        assert shas == {"sw1": "per-file"}
+
+    async def test_missing_repo_raises_without_fallback(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(404, json={"message": "repo not found"})
+
+        gitea = _client_with(handler)
+        with pytest.raises(RuntimeError, match="not found"):
+            await gitea.commit_configs_bulk(
+                "agncf/site-a", {"sw1": b"x", "sw2": b"y"}, "msg",
+            )
+        await gitea.aclose()
+
+        assert [r.method for r in requests] == ["GET"]
+
+    @pytest.mark.parametrize("list_status", [403, 500])
+    async def test_failed_listing_raises_without_commit(self, list_status):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(list_status, text="nope")
+
+        gitea = _client_with(handler)
+        with pytest.raises(RuntimeError, match=f"HTTP {list_status}"):
+            await gitea.commit_configs_bulk("agncf/site-a", {"sw1": b"x"}, "msg")
+        await gitea.aclose()
+
+        assert [r.method for r in requests] == ["GET"]
+
+    async def test_error_raises(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.method == "GET":
+                return httpx.Response(200, json=[])
+            return httpx.Response(500, text="boom")
+
+        gitea = _client_with(handler)
+        with pytest.raises(RuntimeError, match="HTTP 500"):
+            await gitea.commit_configs_bulk("agncf/site-a", {"sw1": b"x"}, "msg")
+        await gitea.aclose()
+
+
+class TestGetDiff:
+    async def test_diffs_raw_file_versions(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            if request.url.path.endswith("/commits"):
+                return httpx.Response(200, json=[{"sha": "new"}, {"sha": "old"}])
+            body = {"old": b"hostname sw1\n", "new": b"hostname sw1-b\n"}
+            return httpx.Response(200, content=body[request.url.params["ref"]])
+
+        gitea = _client_with(handler)
+        diff = await gitea.get_diff("agncf/site-a", "sw1")
+        await gitea.aclose()
+
+        assert "-hostname sw1\n" in diff
+        assert "+hostname sw1-b\n" in diff
+        assert requests[0].url.params["files"] == "false"
+        assert requests[1].url.path == "/api/v1/repos/agncf/site-a/raw/sw1.txt"
@@ -0,0 +1,67 @@
+"""
+Unit tests for app/core/netmiko_pool.py.
+
+Netmiko's ConnectHandler is replaced by a fake — no network required.
+"""
+from app.core.netmiko_pool import NetmikoPool
+
+KEY = ("10.0.0.1", 22, "admin", "cisco_ios")
+
+
+class FakeConn:
+    def __init__(self, **params):
+        self.params = params
+        self.alive = True
+        self.disconnected = False
+
+    def is_alive(self):
+        return self.alive
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+def _pool(ttl: float = 60.0):
+    opened = []
+
+    def connect(**params):
+        conn = FakeConn(**params)
+        opened.append(conn)
+        return conn
+
+    return NetmikoPool(ttl=ttl, connect=connect), opened
+
+
+class TestNetmikoPool:
+    def test_reuses_released_session(self):
+        pool, opened = _pool()
+        conn = pool.acquire(KEY, {"host": "10.0.0.1"})
+        pool.release(KEY, conn, alive=True)
+        assert pool.acquire(KEY, {"host": "10.0.0.1"}) is conn
+        assert len(opened) == 1
+        pool.close()
+
+    def test_failed_session_is_disconnected(self):
+        pool, opened = _pool()
+        conn = pool.acquire(KEY, {})
+        pool.release(KEY, conn, alive=False)
+        assert conn.disconnected
+        assert pool.acquire(KEY, {}) is not conn
+        pool.close()
+
+    def test_dead_session_is_replaced(self):
+        pool, opened = _pool()
+        conn = pool.acquire(KEY, {})
+        pool.release(KEY, conn, alive=True)
+        conn.alive = False
+        assert pool.acquire(KEY, {}) is not conn
+        assert conn.disconnected
+        pool.close()
+
+    def test_reap_closes_expired_sessions(self):
+        pool, opened = _pool(ttl=0.0)
+        conn = pool.acquire(KEY, {})
+        pool.release(KEY, conn, alive=True)
+        pool.reap()
+        assert conn.disconnected
+        pool.close()
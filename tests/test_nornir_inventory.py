@@ -0,0 +1,48 @@
+"""
+Unit tests for app/core/nornir_inventory.py.
+
+Uses the in-memory SQLite session and ORM fixtures from conftest.py.
+"""
+from app.core import nornir_inventory
+from app.core.nornir_inventory import load_device_data
+
+
+class TestLoadDeviceData:
+    async def test_snapshot_with_decrypted_credentials(
+        self, test_db_session, test_settings, sample_device
+    ):
+        devices = await load_device_data(test_db_session, test_settings)
+
+        assert len(devices) == 1
+        dev = devices[0]
+        assert dev.device_id == sample_device.id
+        assert dev.netmiko_platform == "cisco_ios"
+        assert (dev.username, dev.password) == ("testuser", "testpass123")
+        assert dev.site_code == "SITE001"
+        assert not dev.is_api_device
+
+    async def test_password_decrypted_once_across_loads(
+        self, test_db_session, test_settings, sample_device, monkeypatch
+    ):
+        calls = []
+
+        class CountingCipher:
+            def __init__(self, cipher):
+                self._cipher = cipher
+
+            def decrypt(self, token):
+                calls.append(token)
+                return self._cipher.decrypt(token)
+
+        real_get_fernet = nornir_inventory.get_fernet
+        monkeypatch.setattr(
+            nornir_inventory, "get_fernet",
+            lambda key: CountingCipher(real_get_fernet(key)),
+        )
+        monkeypatch.setattr(nornir_inventory, "_decrypted", {})
+
+        for _ in range(3):
+            devices = await load_device_data(test_db_session, test_settings)
+            assert devices[0].password == "testpass123"
+
+        assert len(calls) == 1
@@ -4,8 +4,12 @@ Unit tests for app/core/scrubber.py.
 Covers all six supported platforms with at least one test each, plus edge-case
 and cross-platform tests.  No network or DB access required.
 """
+import hashlib
+
 import pytest
-from app.core.scrubber import ConfigScrubber, scrub_config
+from app.core import hashing
+from app.core.hashing import config_digest
+from app.core.scrubber import ConfigScrubber, scrub_and_digest, scrub_config, scrub_config_bytes
 
 
 # ── Common / cross-platform ────────────────────────────────────────────────────
@@ -257,3 +261,23 @@ class TestScrubConfigWrapper:
         config = "\n\n  hostname r1\n\n"
         result = scrub_config(config, "ios")
         assert result == result.strip()
+
+    def test_bytes_variant_matches_text(self):
+        config = "hostname r1\nuptime is 10 days\ndescription caf\u00e9"
+        assert scrub_config_bytes(config, "ios") == scrub_config(config, "ios").encode("utf-8")
+
+    def test_bytes_input_matches_text_input(self):
+        config = "hostname r1\nuptime is 10 days\n! 2025-02-18T14:30:45\ndescription caf\u00e9"
+        assert scrub_config_bytes(config.encode("utf-8"), "ios") == scrub_config_bytes(config, "ios")
+
+    def test_scrub_and_digest_hashes_scrubbed_bytes(self):
+        config = "hostname r1\nuptime is 10 days"
+        scrubbed, digest = scrub_and_digest(config, "ios")
+        assert scrubbed == scrub_config_bytes(config, "ios")
+        assert digest == config_digest(scrubbed)
+
+    def test_sha256_matches_pre_blake_hashes(self, monkeypatch):
+        monkeypatch.setattr(hashing, "_algorithm", hashing.hash_algorithm())
+        hashing.set_hash_algorithm("sha256")
+        scrubbed = scrub_config_bytes("hostname r1", "ios")
+        assert config_digest(scrubbed).hex() == hashlib.sha256(scrubbed).hexdigest()